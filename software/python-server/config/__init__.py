@@ -1,12 +1,52 @@
 """Configuration package for FlaskServer."""
 
-from .settings import BASE_DIR, WHISPER_CACHE, MODEL_CATALOG_PATH, DEVICE_REGISTRY_PATH
-from .secrets import get_api_key
+from .settings import (
+    BASE_DIR,
+    WHISPER_CACHE,
+    WHISPER_PRELOAD_MODEL,
+    WHISPER_IDLE_TTL,
+    WHISPER_BATCH_SIZE,
+    MODEL_CATALOG_PATH,
+    DEVICE_REGISTRY_PATH,
+    DEVICE_REGISTRY_DB_PATH,
+    DEVICE_REGISTRY_BACKEND,
+    REGISTRY_FLUSH_INTERVAL,
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_THREADS,
+    SERVER_OUTBUF_HIGH_WATERMARK,
+    MAX_UPLOAD_BYTES,
+    DEBUG,
+    PASS1_BATCH_MAX,
+    PASS1_BATCH_WAIT_MS,
+    PASS1_TIMEOUT,
+    PASS2_PROMPT_CACHE,
+    ASSISTANT_FUSED_PASS,
+)
+from .secrets import get_api_key, clear_api_key_cache
 
 __all__ = [
     "BASE_DIR",
     "WHISPER_CACHE",
+    "WHISPER_PRELOAD_MODEL",
+    "WHISPER_IDLE_TTL",
+    "WHISPER_BATCH_SIZE",
     "MODEL_CATALOG_PATH",
     "DEVICE_REGISTRY_PATH",
+    "DEVICE_REGISTRY_DB_PATH",
+    "DEVICE_REGISTRY_BACKEND",
+    "REGISTRY_FLUSH_INTERVAL",
+    "SERVER_HOST",
+    "SERVER_PORT",
+    "SERVER_THREADS",
+    "SERVER_OUTBUF_HIGH_WATERMARK",
+    "MAX_UPLOAD_BYTES",
+    "DEBUG",
+    "PASS1_BATCH_MAX",
+    "PASS1_BATCH_WAIT_MS",
+    "PASS1_TIMEOUT",
+    "PASS2_PROMPT_CACHE",
+    "ASSISTANT_FUSED_PASS",
     "get_api_key",
+    "clear_api_key_cache",
 ]
@@ -1,24 +1,31 @@
 """API key management for external services."""
 
 import os
-import json
+from functools import lru_cache
+
+import orjson
+
 from .settings import APIS_JSON, ALT_APIS_JSON
 
 
+@lru_cache(maxsize=4)
 def _load_json(path):
     """Load JSON file from disk."""
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        return orjson.loads(path.read_bytes())
     except FileNotFoundError:
         return {}
     except Exception:
         return {}
 
 
+@lru_cache(maxsize=1)
 def get_api_key() -> str:
     """Get Gemini API key from secrets file or environment variable.
     
+    The result is cached; call clear_api_key_cache() after changing the
+    secrets file or environment.
+    
     Returns:
         API key string, or empty string if not found.
     """
@@ -28,3 +35,9 @@ def get_api_key() -> str:
     if isinstance(gem, dict):
         api_key = gem.get("api_key") or gem.get("apiKey") or gem.get("api_key_env_var")
     return api_key or os.getenv("GEMINI_API_KEY", "")
+
+
+def clear_api_key_cache() -> None:
+    """Forget the cached secrets so the next get_api_key() re-reads them."""
+    _load_json.cache_clear()
+    get_api_key.cache_clear()
@@ -18,6 +18,48 @@ os.environ["HUGGINGFACE_HUB_CACHE"] = str(WHISPER_CACHE / "hub")
 # Data file paths
 MODEL_CATALOG_PATH = BASE_DIR / "models" / "model_catalog.json"
 DEVICE_REGISTRY_PATH = BASE_DIR / "device_registry.json"
+DEVICE_REGISTRY_DB_PATH = BASE_DIR / "device_registry.db"
+
+# Device registry persistence: "json" (default) or "sqlite".
+# Run scripts/migrate_registry_to_sqlite.py once before switching to sqlite.
+DEVICE_REGISTRY_BACKEND = os.environ.get("DEVICE_REGISTRY_BACKEND", "json").lower()
+
+# HTTP server (waitress in production, Werkzeug dev server when FLASK_DEBUG=1)
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "5000"))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", "8"))
+# Bytes waitress buffers per connection before a streaming response's
+# generator is paused until the client catches up (waitress default: 16 MiB)
+SERVER_OUTBUF_HIGH_WATERMARK = int(os.environ.get("SERVER_OUTBUF_HIGH_WATERMARK", str(1024 * 1024)))
+# Largest request body accepted (audio uploads); larger ones get 413. 0 disables
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+DEBUG = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
+
+# Whisper model loaded at startup (the app's default STT model); empty disables
+WHISPER_PRELOAD_MODEL = os.environ.get("WHISPER_PRELOAD_MODEL", "small")
+# Free the Whisper model after this many idle seconds (0 keeps it loaded)
+WHISPER_IDLE_TTL = float(os.environ.get("WHISPER_IDLE_TTL", "0"))
+# Speech segments decoded together per batch; above 1, long recordings are
+# split at pauses and the pieces decoded in parallel (0/1: sequential).
+# Needs faster-whisper 1.1+; the pinned 1.0.3 ignores it with a warning
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "0"))
+
+# Seconds between background writes of pending device registry changes
+REGISTRY_FLUSH_INTERVAL = float(os.environ.get("REGISTRY_FLUSH_INTERVAL", "2"))
+
+# Pass 1 categorization micro-batching (PASS1_BATCH_MAX=1 disables batching;
+# only used when ASSISTANT_FUSED_PASS is off)
+PASS1_BATCH_MAX = int(os.environ.get("PASS1_BATCH_MAX", "8"))
+PASS1_BATCH_WAIT_MS = int(os.environ.get("PASS1_BATCH_WAIT_MS", "75"))
+PASS1_TIMEOUT = float(os.environ.get("PASS1_TIMEOUT", "30"))
+
+# Categorize and generate bt-control commands in one Gemini call
+# (ASSISTANT_FUSED_PASS=0 falls back to separate Pass 1 / Pass 2 calls)
+ASSISTANT_FUSED_PASS = os.environ.get("ASSISTANT_FUSED_PASS", "1").lower() in ("1", "true", "yes")
+
+# Explicit Gemini context cache for the Pass 2 bt-control instructions
+# (skipped while the instructions are below Gemini's minimum cacheable size)
+PASS2_PROMPT_CACHE = os.environ.get("PASS2_PROMPT_CACHE", "1").lower() in ("1", "true", "yes")
 
 # API configuration
 APIS_JSON = BASE_DIR / "secrets" / "apis.json"
@@ -1,12 +1,32 @@
-"""Core utilities for FlaskServer."""
+"""Core utilities for FlaskServer.
 
-from .whisper_loader import WhisperLoader
-from .gemini_loader import GeminiLoader
-from .utils import load_json, save_json
+The model loaders pull in faster-whisper/torch and google-generativeai, so
+they are imported on first attribute access rather than with the package.
+"""
+
+from importlib import import_module
+
+from .utils import load_json, save_json, atomic_write_bytes, orjsonify, sse_event
+
+_LAZY_ATTRS = {
+    "WhisperLoader": ".whisper_loader",
+    "GeminiLoader": ".gemini_loader",
+}
 
 __all__ = [
     "WhisperLoader",
     "GeminiLoader",
     "load_json",
     "save_json",
+    "atomic_write_bytes",
+    "orjsonify",
+    "sse_event",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
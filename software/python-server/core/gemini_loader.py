@@ -1,10 +1,18 @@
 """Gemini LM model initialization and configuration."""
 
+import time
+import weakref
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
 try:
     import google.generativeai as gemini
+    from google.generativeai import caching as gemini_caching
     _gemini_import_error = None
 except Exception as e:
     gemini = None
+    gemini_caching = None
     _gemini_import_error = e
 
 from config import get_api_key
@@ -13,9 +21,25 @@ from config import get_api_key
 class GeminiLoader:
     """Manages Gemini language model initialization."""
     
+    # Seconds list_available_models() reuses its last API result
+    MODELS_LIST_TTL = 300
+    
+    # Every loader, so reset_all() can reach the ones services hold
+    _instances: "weakref.WeakSet[GeminiLoader]" = weakref.WeakSet()
+    
     def __init__(self):
         """Initialize the Gemini loader."""
+        GeminiLoader._instances.add(self)
+        # Bumped by reset(); lets callers drop models they built from this loader
+        self.generation = 0
         self._configured = False
+        self._configure_lock = Lock()
+        # GenerativeModel instances are stateless per call, so one per
+        # identifier is shared by all requests (and their API client)
+        self._models: Dict[str, object] = {}
+        self._models_lock = Lock()
+        # (fetched at, display name -> identifier) from list_available_models
+        self._models_list_cache: Optional[Tuple[float, Dict[str, str]]] = None
         print("[GEMINI] Initialized loader")
     
     def get_model(self, model_identifier: str):
@@ -25,19 +49,64 @@ class GeminiLoader:
             model_identifier: Full model identifier (e.g., 'models/gemini-2.5-flash')
         
         Returns:
-            Configured GenerativeModel instance.
+            Configured GenerativeModel instance, reused across calls.
+        
+        Raises:
+            RuntimeError: If API key not configured or library not installed.
+        """
+        model = self._models.get(model_identifier)
+        if model is not None:
+            return model
+        
+        self._ensure_configured()
+        with self._models_lock:
+            model = self._models.get(model_identifier)
+            if model is None:
+                model = gemini.GenerativeModel(model_identifier)
+                self._models[model_identifier] = model
+            return model
+    
+    def create_cached_model(self, model_identifier: str, system_instruction: str, ttl_seconds: int):
+        """Create an explicit context cache and a model bound to it.
+        
+        Args:
+            model_identifier: Model identifier (e.g., 'gemini-2.5-flash-lite')
+            system_instruction: Static instructions to store in the cache
+            ttl_seconds: Cache lifetime in seconds
+        
+        Returns:
+            GenerativeModel that sends the cached instructions with every call.
         
         Raises:
             RuntimeError: If API key not configured or library not installed.
+            Exception: Whatever the API raises (e.g. content below the
+                minimum cacheable size).
         """
+        self._ensure_configured()
+        if not model_identifier.startswith("models/"):
+            model_identifier = f"models/{model_identifier}"
+        cached = gemini_caching.CachedContent.create(
+            model=model_identifier,
+            system_instruction=system_instruction,
+            ttl=timedelta(seconds=ttl_seconds),
+        )
+        print(f"[GEMINI] ✓ Created context cache {cached.name} for {model_identifier}")
+        return gemini.GenerativeModel.from_cached_content(cached_content=cached)
+    
+    def _ensure_configured(self) -> None:
+        """Check the library is available and configure the API key once."""
         if gemini is None:
             raise RuntimeError(
                 f"google-generativeai not available: {_gemini_import_error!r}. "
                 "Install with: pip install google-generativeai"
             )
         
-        # Configure API key (only once)
-        if not self._configured:
+        # Configure API key (only once, even with concurrent first requests)
+        if self._configured:
+            return
+        with self._configure_lock:
+            if self._configured:
+                return
             api_key = get_api_key()
             if not api_key:
                 raise RuntimeError(
@@ -46,38 +115,60 @@ class GeminiLoader:
             gemini.configure(api_key=api_key)
             self._configured = True
             print("[GEMINI] ✓ API configured")
+    
+    def reset(self) -> None:
+        """Forget the API configuration and every model built with it.
         
-        return gemini.GenerativeModel(model_identifier)
+        The next call re-reads the API key and configures the library
+        again. Models already handed out keep their old client, so callers
+        that hold on to them should compare ``generation``.
+        """
+        with self._configure_lock:
+            self._configured = False
+            with self._models_lock:
+                self._models.clear()
+            self._models_list_cache = None
+            self.generation += 1
+    
+    @classmethod
+    def reset_all(cls) -> None:
+        """reset() every loader (e.g. after the API key changed)."""
+        for loader in list(cls._instances):
+            loader.reset()
+        print("[GEMINI] API configuration reset")
+    
+    def invalidate_models_cache(self) -> None:
+        """Make the next list_available_models() call query the API again."""
+        self._models_list_cache = None
     
     def list_available_models(self) -> dict:
         """List all available Gemini models from API.
         
+        The result is cached for MODELS_LIST_TTL seconds; callers must not
+        mutate it.
+        
         Returns:
             Dictionary mapping display names to model identifiers.
         
         Raises:
             RuntimeError: If API not accessible.
         """
-        if gemini is None:
-            raise RuntimeError("google-generativeai not installed")
+        cached = self._models_list_cache
+        if cached is not None and time.monotonic() - cached[0] < self.MODELS_LIST_TTL:
+            return cached[1]
         
-        # Configure if not already done
-        if not self._configured:
-            api_key = get_api_key()
-            if not api_key:
-                raise RuntimeError("No API key configured")
-            gemini.configure(api_key=api_key)
-            self._configured = True
+        self._ensure_configured()
         
         available_models = {}
         for model in gemini.list_models():
-            model_name = model.name
             # Filter for generative models only
-            if hasattr(model, 'supported_generation_methods') and \
-               'generateContent' in model.supported_generation_methods:
-                display_name = model_name.split('/')[-1] if '/' in model_name else model_name
-                # Only include gemini models
-                if display_name.startswith('gemini'):
-                    available_models[display_name] = model_name
+            if 'generateContent' not in getattr(model, 'supported_generation_methods', ()):
+                continue
+            model_name = model.name
+            display_name = model_name.rpartition('/')[2]
+            # Only include gemini models
+            if display_name.startswith('gemini'):
+                available_models[display_name] = model_name
         
+        self._models_list_cache = (time.monotonic(), available_models)
         return available_models
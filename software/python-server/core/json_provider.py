@@ -0,0 +1,40 @@
+"""orjson-backed JSON provider for Flask.
+
+Installed in main.py as ``app.json`` so ``request.get_json()`` and
+``jsonify()`` both go through orjson.
+"""
+
+import decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# Allow non-str dict keys like Flask's default provider does
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Serialize types orjson doesn't handle natively (as Flask does)."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider using orjson for both parsing and encoding."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response without the bytes -> str -> bytes round trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=_OPTIONS),
+            mimetype="application/json",
+        )
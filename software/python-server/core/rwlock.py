@@ -0,0 +1,53 @@
+"""Readers-writer lock for shared in-memory state."""
+
+from contextlib import contextmanager
+from threading import Condition, Lock
+
+
+class RWLock:
+    """Lets any number of readers in at once, or a single writer.
+
+    A waiting writer holds back new readers, so a steady stream of reads
+    cannot starve writes. Not reentrant: a thread must not take either
+    side again while it already holds the lock.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked RWLock."""
+        self._cond = Condition(Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_locked(self):
+        """Hold the lock shared for the duration of the ``with`` block."""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_locked(self):
+        """Hold the lock exclusively for the duration of the ``with`` block."""
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
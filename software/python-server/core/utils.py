@@ -1,12 +1,51 @@
 """Shared utility functions."""
 
-import json
+import mmap
+import os
+import queue
+import threading
+import time
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import orjson
+from flask import Response
+
+# Files above this size are memory-mapped instead of copied into a bytes object
+MMAP_THRESHOLD_BYTES = 64 * 1024
+
+# Fixed parts of the SSE 'data' event that wraps a text chunk as {"chunk": ...};
+# only the text itself is serialized per chunk
+SSE_CHUNK_PREFIX = b'event: data\ndata: {"chunk":'
+SSE_CHUNK_SUFFIX = b'}\n\n'
+
+# coalesce_text() budget: emit once this much text or time has built up
+COALESCE_MAX_CHARS = 256
+COALESCE_MAX_DELAY = 0.016
+# Chunks coalesce_text()'s reader thread may get ahead of the consumer
+COALESCE_QUEUE_SIZE = 32
+
+
+def _load_json_mmap(path: Path):
+    """Parse JSON straight off the page cache via mmap."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    try:
+        with memoryview(mm) as view:
+            return orjson.loads(view)
+    finally:
+        mm.close()
 
 
 def load_json(path: Path) -> dict:
     """Load JSON file from disk.
     
+    Large files are memory-mapped; small files are read in one call
+    since mmap setup costs more than the copy it saves.
+    
     Args:
         path: Path to JSON file.
         
@@ -14,16 +53,47 @@ def load_json(path: Path) -> dict:
         Dictionary with file contents, or empty dict if file not found.
     """
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        if path.stat().st_size > MMAP_THRESHOLD_BYTES:
+            return _load_json_mmap(path)
+        return orjson.loads(path.read_bytes())
     except FileNotFoundError:
         return {}
     except Exception as e:
         raise RuntimeError(f"Failed to read {path}: {e}")
 
 
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """Replace a file's contents without ever exposing a partial write.
+    
+    Writes to a sibling temp file, fsyncs it, then renames it over the
+    target so readers (and a crash mid-write) never observe a truncated
+    file. The temp file is removed if anything fails.
+    
+    Args:
+        path: File to write.
+        payload: New contents.
+    
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
 def save_json(path: Path, data: dict) -> None:
-    """Save dictionary to JSON file.
+    """Save dictionary to JSON file (atomically, see atomic_write_bytes).
     
     Args:
         path: Path to JSON file.
@@ -31,7 +101,148 @@ def save_json(path: Path, data: dict) -> None:
     """
     try:
         path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        atomic_write_bytes(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
     except Exception as e:
         raise RuntimeError(f"Failed to write {path}: {e}")
+
+
+def orjsonify(payload, status: int = 200) -> Response:
+    """Build a JSON response with orjson instead of Flask's jsonify.
+    
+    Meant for the larger payloads (catalog, device list); small status
+    replies can keep using jsonify.
+    
+    Args:
+        payload: JSON-serializable data.
+        status: HTTP status code.
+    
+    Returns:
+        Flask Response with an application/json body.
+    """
+    return Response(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
+def sse_event(event: str, data) -> bytes:
+    """Encode one Server-Sent Events frame.
+    
+    Streams yield these bytes directly, so Flask has no str to encode.
+    Frames whose data never changes should be built once at import time.
+    
+    Args:
+        event: SSE event name (e.g. 'status', 'data').
+        data: JSON-serializable payload for the data line.
+    
+    Returns:
+        The encoded frame, including the blank line that ends it.
+    """
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class _PumpError:
+    """Carries an exception from coalesce_text()'s reader thread."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_PUMP_END = object()
+
+
+def _put_until_stopped(out: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Block until item is queued; give up (False) once stop is set."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _pump(texts: Iterable[str], out: "queue.Queue", stop: threading.Event) -> None:
+    """Feed every chunk (then an end marker) into a queue until stopped.
+    
+    The queue is bounded, so a slow consumer holds back reads from texts.
+    Once stop is set the remaining input is abandoned and texts is closed.
+    """
+    try:
+        for text in texts:
+            if not _put_until_stopped(out, text, stop):
+                return
+    except BaseException as e:
+        _put_until_stopped(out, _PumpError(e), stop)
+    else:
+        _put_until_stopped(out, _PUMP_END, stop)
+    finally:
+        close = getattr(texts, "close", None)
+        if close is not None:
+            close()
+
+
+def coalesce_text(
+    texts: Iterable[str],
+    max_chars: int = COALESCE_MAX_CHARS,
+    max_delay: float = COALESCE_MAX_DELAY,
+) -> Iterator[str]:
+    """Join small streamed text chunks into fewer, larger pieces.
+    
+    A chunk is passed on straight away (with anything buffered before it)
+    when max_delay seconds have passed since the last piece went out, or
+    once max_chars of text is buffered. Chunks arriving in quick bursts
+    are held back, but never for longer than max_delay: the input is read
+    on a helper thread, so buffered text still goes out on time when the
+    source stalls. That thread stays at most COALESCE_QUEUE_SIZE chunks
+    ahead of the consumer, and stops reading (closing texts) once this
+    generator finishes or is closed. Empty chunks are skipped, and an
+    exception raised by the source is re-raised here after the buffered
+    text is emitted.
+    
+    Args:
+        texts: Text chunks, e.g. from a streaming model response.
+        max_chars: Size budget per emitted piece.
+        max_delay: Minimum spacing between pieces, in seconds.
+    
+    Yields:
+        Concatenated text pieces.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=COALESCE_QUEUE_SIZE)
+    stop = threading.Event()
+    threading.Thread(target=_pump, args=(texts, chunks, stop), daemon=True).start()
+    try:
+        yield from _coalesce_queued(chunks, max_chars, max_delay)
+    finally:
+        # Consumer finished or went away (e.g. client disconnected)
+        stop.set()
+
+
+def _coalesce_queued(chunks: "queue.Queue", max_chars: int, max_delay: float) -> Iterator[str]:
+    """coalesce_text()'s consumer side, reading from the pump's queue."""
+    buf = []
+    buf_chars = 0
+    last_emit = 0.0
+    while True:
+        try:
+            item = chunks.get(timeout=max(0.0, last_emit + max_delay - time.monotonic()) if buf else None)
+        except queue.Empty:
+            # Window over with no new chunk: send what is buffered
+            item = None
+        
+        if item is _PUMP_END or isinstance(item, _PumpError):
+            if buf:
+                yield "".join(buf)
+            if item is not _PUMP_END:
+                raise item.error
+            return
+        if item:
+            buf.append(item)
+            buf_chars += len(item)
+        elif item is not None or not buf:
+            # Empty chunk
+            continue
+        
+        now = time.monotonic()
+        if item is None or buf_chars >= max_chars or now - last_emit >= max_delay:
+            yield "".join(buf)
+            buf.clear()
+            buf_chars = 0
+            last_emit = now
@@ -1,40 +1,106 @@
-"""Whisper model loading and caching for Speech-to-Text."""
+"""Whisper model loading and caching for Speech-to-Text.
 
+faster-whisper and torch are heavy to import, so they are imported on first
+use rather than with this module.
+"""
+
+import gc
+import os
+import time
+import wave
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional
+from threading import Lock, Semaphore
+from typing import BinaryIO, Dict, Optional, Union
+
+from config import WHISPER_CACHE
 
-try:
-    from faster_whisper import WhisperModel
-    _whisper_import_error = None
-except ImportError as e:
-    WhisperModel = None
-    _whisper_import_error = e
+# Filled in by _import_whisper() / _import_torch() on first use
+WhisperModel = None
+# None with faster-whisper releases older than 1.1
+BatchedInferencePipeline = None
+_whisper_import_error: Optional[Exception] = None
+torch = None
+_torch_import_error: Optional[Exception] = None
 
-try:
-    import torch
-    _torch_import_error = None
-except ImportError as e:
-    torch = None
-    _torch_import_error = e
 
-from config import WHISPER_CACHE
+def _import_whisper():
+    """Import faster-whisper once; returns WhisperModel or None if unavailable."""
+    global WhisperModel, BatchedInferencePipeline, _whisper_import_error
+    if WhisperModel is None and _whisper_import_error is None:
+        try:
+            import faster_whisper
+            WhisperModel = faster_whisper.WhisperModel
+            BatchedInferencePipeline = getattr(faster_whisper, "BatchedInferencePipeline", None)
+        except ImportError as e:
+            _whisper_import_error = e
+    return WhisperModel
+
+
+def _import_torch():
+    """Import torch once; returns the module or None if unavailable."""
+    global torch, _torch_import_error
+    if torch is None and _torch_import_error is None:
+        try:
+            import torch as torch_module
+            torch = torch_module
+        except ImportError as e:
+            _torch_import_error = e
+    return torch
 
 
 class WhisperLoader:
     """Manages Whisper model loading and in-memory caching."""
     
+    # Uploads below either limit are treated as silence without decoding
+    MIN_AUDIO_BYTES = 1024
+    MIN_AUDIO_SECONDS = 0.25
+    
+    # Models kept resident per device (least recently used evicted first);
+    # GPUs rarely have room for more than one
+    MAX_MODELS = {"cpu": 2, "cuda": 1}
+    
     def __init__(self):
         """Initialize the Whisper loader with empty cache."""
-        self._cache: Dict[str, dict] = {}
+        # model name -> entry, least recently used first
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        # Serializes loads so a startup preload and a first request never
+        # load the same weights twice
+        self._load_lock = Lock()
+        # One transcription at a time per model: faster-whisper already uses
+        # several threads per decode, and concurrent decodes oversubscribe
+        # the CPU. Other endpoints keep running on their own worker threads.
+        self._model_locks: Dict[str, Semaphore] = {}
+        # Result of the first CUDA probe; see refresh_device()
+        self._detected_device: Optional[str] = None
+        # batch_size > 1 without BatchedInferencePipeline is reported once
+        self._batch_unsupported_warned = False
         print(f"[WHISPER] Initialized loader with cache: {WHISPER_CACHE}")
     
     def detect_device(self) -> str:
         """Detect if CUDA is available.
         
+        The CUDA probe runs once; later calls return the cached answer.
+        
+        Returns:
+            'cuda' if CUDA is available, 'cpu' otherwise.
+        """
+        if self._detected_device is None:
+            self._detected_device = self._probe_device()
+        return self._detected_device
+    
+    def refresh_device(self) -> str:
+        """Re-run the CUDA probe (e.g. after a GPU was added or its driver restarted).
+        
         Returns:
             'cuda' if CUDA is available, 'cpu' otherwise.
         """
-        if torch is not None:
+        self._detected_device = self._probe_device()
+        return self._detected_device
+    
+    @staticmethod
+    def _probe_device() -> str:
+        if _import_torch() is not None:
             try:
                 return "cuda" if torch.cuda.is_available() else "cpu"
             except Exception:
@@ -51,17 +117,35 @@ class WhisperLoader:
             print(f"[WHISPER] Clearing cached model: {model_name}")
             del self._cache[model_name]
     
-    def get_model(self, model_name: str, device: str = "auto"):
+    @staticmethod
+    def default_compute_type(device: str) -> str:
+        """Pick the quantization for a device.
+        
+        GPUs run half precision on tensor cores, so CUDA uses int8 weights
+        with float16 compute; CPUs keep plain int8.
+        
+        Args:
+            device: 'cpu' or 'cuda'
+        
+        Returns:
+            faster-whisper compute_type string.
+        """
+        return "int8_float16" if device == "cuda" else "int8"
+    
+    def get_model(self, model_name: str, device: str = "auto", compute_type: Optional[str] = None):
         """Load or retrieve cached Whisper model.
         
         Implements caching strategy:
-        - If model is already cached and device matches, reuse it
-        - If different model requested, clear old cache and load new model
-        - Device is auto-detected on each call for dynamic CUDA availability
+        - If model is already cached and device/compute type match, reuse it
+        - Otherwise load it, evicting least recently used models beyond
+          MAX_MODELS for the device
+        - 'auto' uses the cached detect_device() result (see refresh_device)
         
         Args:
             model_name: Display name from faster-whisper (e.g., 'small', 'base', 'large-v3')
             device: 'cpu', 'cuda', or 'auto' (auto-detect GPU)
+            compute_type: faster-whisper compute type (e.g. 'float16');
+                defaults to default_compute_type(device)
         
         Returns:
             Configured WhisperModel instance.
@@ -69,7 +153,7 @@ class WhisperLoader:
         Raises:
             RuntimeError: If faster-whisper is not installed or model loading fails.
         """
-        if WhisperModel is None:
+        if _import_whisper() is None:
             raise RuntimeError(
                 f"faster-whisper is not installed: {_whisper_import_error!r}. "
                 "Install with: pip install faster-whisper"
@@ -78,39 +162,54 @@ class WhisperLoader:
         # Auto-detect device if requested
         if device == "auto":
             device = self.detect_device()
+        if compute_type is None:
+            compute_type = self.default_compute_type(device)
         
+        with self._load_lock:
+            return self._get_or_load(model_name, device, compute_type)
+    
+    def _get_or_load(self, model_name: str, device: str, compute_type: str):
+        """Return the cached model or load it (caller holds the load lock)."""
         # Check if model is already cached in memory
         if model_name in self._cache:
             cached_entry = self._cache[model_name]
             cached_device = cached_entry.get("device")
+            cached_compute_type = cached_entry.get("compute_type")
             
-            # If device changed, reload model
-            if cached_device == device:
+            # If device or compute type changed, reload model
+            if cached_device == device and cached_compute_type == compute_type:
                 print(f"[WHISPER] Reusing cached model: {model_name} on {device}")
+                cached_entry["last_used"] = time.monotonic()
+                self._cache.move_to_end(model_name)
                 return cached_entry["model"]
             else:
-                print(f"[WHISPER] Device changed ({cached_device} → {device}), reloading...")
+                print(
+                    f"[WHISPER] Device/compute type changed ({cached_device}/{cached_compute_type} → "
+                    f"{device}/{compute_type}), reloading..."
+                )
                 self.clear_cached_model(model_name)
         
-        # Clear any other cached models (keep only one model in memory)
-        for cached_name in list(self._cache.keys()):
-            if cached_name != model_name:
-                self.clear_cached_model(cached_name)
+        # Make room before loading (least recently used first)
+        max_models = self.MAX_MODELS.get(device, 1)
+        while len(self._cache) >= max_models:
+            self.clear_cached_model(next(iter(self._cache)))
         
         try:
             # Load model (faster-whisper handles local cache automatically)
-            print(f"[WHISPER] Loading model: {model_name} on {device}")
+            print(f"[WHISPER] Loading model: {model_name} on {device} ({compute_type})")
             model = WhisperModel(
                 model_name,
                 device=device,
-                compute_type="int8",
+                compute_type=compute_type,
                 download_root=str(WHISPER_CACHE),
             )
             
             # Cache the loaded model in memory
             self._cache[model_name] = {
                 "model": model,
-                "device": device
+                "device": device,
+                "compute_type": compute_type,
+                "last_used": time.monotonic()
             }
             
             print(f"[WHISPER] Model loaded: {model_name}")
@@ -119,20 +218,105 @@ class WhisperLoader:
         except Exception as e:
             raise RuntimeError(f"Failed to load Whisper model {model_name}: {e}")
     
+    def evict_idle(self, max_idle_seconds: float) -> int:
+        """Drop cached models that haven't been used for a while.
+        
+        Frees the model's RAM, and its GPU memory when it was on CUDA.
+        
+        Args:
+            max_idle_seconds: Evict models unused for longer than this.
+        
+        Returns:
+            Number of models evicted.
+        """
+        cutoff = time.monotonic() - max_idle_seconds
+        with self._load_lock:
+            idle = [name for name, entry in self._cache.items() if entry.get("last_used", 0) < cutoff]
+            if not idle:
+                return 0
+            on_cuda = any(self._cache[name].get("device") == "cuda" for name in idle)
+            for name in idle:
+                print(f"[WHISPER] Evicting idle model: {name}")
+                self.clear_cached_model(name)
+        
+        gc.collect()
+        if on_cuda and torch is not None:
+            try:
+                torch.cuda.empty_cache()
+            except Exception:
+                pass
+        return len(idle)
+    
+    def _is_too_short(self, audio: Union[str, BinaryIO]) -> bool:
+        """Check size (and for WAV, duration from the header) against the minimums.
+        
+        File objects are measured from their current position and left there.
+        """
+        if isinstance(audio, str):
+            try:
+                size = os.path.getsize(audio)
+            except OSError:
+                # Missing/unreadable: leave the error to the transcription
+                return False
+            return self._check_too_short(audio, size)
+        start = audio.tell()
+        size = audio.seek(0, os.SEEK_END) - start
+        audio.seek(start)
+        try:
+            return self._check_too_short(audio, size)
+        finally:
+            audio.seek(start)
+    
+    def _check_too_short(self, audio: Union[str, BinaryIO], size: int) -> bool:
+        if size < self.MIN_AUDIO_BYTES:
+            return True
+        try:
+            with wave.open(audio, "rb") as wav:
+                return wav.getnframes() < wav.getframerate() * self.MIN_AUDIO_SECONDS
+        except (OSError, EOFError, wave.Error):
+            # Not a PCM WAV (or unreadable header): let faster-whisper decide
+            return False
+    
+    def preload(self, model_name: str, device: str = "auto", compute_type: Optional[str] = None) -> None:
+        """Load a model into the cache ahead of the first transcription.
+        
+        Args:
+            model_name: Display name from faster-whisper (e.g., 'small')
+            device: 'cpu', 'cuda', or 'auto' (auto-detect GPU)
+            compute_type: Optional compute type (see get_model)
+        
+        Raises:
+            RuntimeError: If faster-whisper is not installed or loading fails.
+        """
+        self.get_model(model_name, device=device, compute_type=compute_type)
+    
     def transcribe(
         self,
-        audio_file_path: str,
+        audio_file_path: Union[str, BinaryIO],
         model_name: str,
         language: Optional[str] = None,
-        device: str = "auto"
+        device: str = "auto",
+        compute_type: Optional[str] = None,
+        beam_size: int = 1,
+        batch_size: int = 0
     ) -> str:
         """Transcribe an audio file using a Whisper model.
         
         Args:
-            audio_file_path: Path to the audio file (.wav, .mp3, etc.)
+            audio_file_path: Path to the audio file (.wav, .mp3, etc.), or a
+                seekable binary file object (e.g. an upload's stream) that
+                is decoded without writing it to disk
             model_name: Display name from faster-whisper (e.g., 'small', 'base')
             language: Optional language code (e.g., 'en'). Auto-detect if None.
             device: 'cpu', 'cuda', or 'auto' (recommended: 'auto')
+            compute_type: Optional compute type, e.g. 'float16' for best GPU quality
+            beam_size: Decoder beam width; 1 is greedy decoding (fastest),
+                5 matches Whisper's beam search for best accuracy
+            batch_size: Above 1, split the audio at pauses (VAD) and decode
+                that many speech segments per batch with faster-whisper's
+                BatchedInferencePipeline (faster-whisper 1.1+; older
+                releases log a warning and decode sequentially); 0 or 1
+                decodes sequentially
         
         Returns:
             Transcribed text as a string.
@@ -140,26 +324,46 @@ class WhisperLoader:
         Raises:
             RuntimeError: If transcription fails.
         """
-        model = self.get_model(model_name, device=device)
+        if self._is_too_short(audio_file_path):
+            print("[WHISPER] Audio too short, skipping transcription")
+            return ""
+        
+        model = self.get_model(model_name, device=device, compute_type=compute_type)
+        model_lock = self._model_locks.setdefault(model_name, Semaphore(1))
+        
+        if batch_size > 1 and BatchedInferencePipeline is None:
+            if not self._batch_unsupported_warned:
+                self._batch_unsupported_warned = True
+                print(
+                    f"[WHISPER] WARNING: batch_size={batch_size} ignored; batched decoding "
+                    "needs faster-whisper 1.1 or newer (pip install -U faster-whisper)"
+                )
+            batch_size = 0
         
         try:
-            # Transcribe with faster-whisper
-            segments, info = model.transcribe(
-                audio_file_path,
-                language=language,
-                beam_size=5,
-                vad_filter=True,
-            )
-            
-            # Convert generator to list
-            segment_list = list(segments)
-            
-            # Check if no segments detected (empty audio or silence)
-            if not segment_list:
-                return ""
-            
-            # Concatenate all segments
-            transcription = " ".join([segment.text for segment in segment_list])
+            # Segments decode lazily, so the lock covers the join as well
+            with model_lock:
+                if batch_size > 1:
+                    # The pipeline only wraps the model (plus per-call state),
+                    # so a fresh one per request is cheap and never shared
+                    segments, info = BatchedInferencePipeline(model=model).transcribe(
+                        audio_file_path,
+                        language=language,
+                        beam_size=beam_size,
+                        batch_size=batch_size,
+                    )
+                else:
+                    # Transcribe with faster-whisper
+                    segments, info = model.transcribe(
+                        audio_file_path,
+                        language=language,
+                        beam_size=beam_size,
+                        vad_filter=True,
+                    )
+                
+                # Concatenate segment texts straight from the generator; no
+                # segments (empty audio or silence) gives an empty string
+                transcription = " ".join(segment.text for segment in segments)
             return transcription.strip()
             
         except Exception as e:
@@ -15,15 +15,28 @@ Architecture:
 - models/: Data models and persistence
 """
 
-import time
+import atexit
+import logging
+import queue
+import signal
 import threading
+from logging.handlers import QueueHandler, QueueListener
 from flask import Flask, request
 
 # Import configuration
-from config import DEVICE_REGISTRY_PATH
+from config import DEVICE_REGISTRY_PATH, DEVICE_REGISTRY_DB_PATH, DEVICE_REGISTRY_BACKEND
+from config import REGISTRY_FLUSH_INTERVAL
+from config import SERVER_HOST, SERVER_PORT, SERVER_THREADS, SERVER_OUTBUF_HIGH_WATERMARK, DEBUG
+from config import MAX_UPLOAD_BYTES
+from config import clear_api_key_cache
+
+# Import core helpers
+from core.json_provider import OrjsonProvider
+from core.gemini_loader import GeminiLoader
 
 # Import models
 from models.device_model import DeviceRegistry
+from models.device_store import SQLiteDeviceStore
 import models.device_model as registry_module
 
 # Import services
@@ -35,47 +48,113 @@ from routes import health_routes, device_routes, lm_routes
 from routes import assistant_routes, heartbeat_routes
 
 
+class _DeferredFormatQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+    
+    The stock prepare() formats the message so records can be pickled;
+    the queue never leaves this process, so that work is skipped here.
+    """
+    
+    def prepare(self, record):
+        return record
+
+
+# Request threads only enqueue log records; a background listener formats
+# and writes them, so slow stdout never stalls a request
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+logging.basicConfig(
+    level=logging.DEBUG if DEBUG else logging.INFO,
+    handlers=[_DeferredFormatQueueHandler(_log_queue)],
+)
+_log_listener = QueueListener(_log_queue, _log_output)
+_log_listener.start()
+# Registered first, so it runs last and drains records logged by later exit hooks
+atexit.register(_log_listener.stop)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Oversized uploads are rejected with 413 before the body is read
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES or None
 
 # Initialize device registry
 print("[MAIN] Initializing device registry...")
-registry_module.device_registry = DeviceRegistry(DEVICE_REGISTRY_PATH)
+registry_store = None
+if DEVICE_REGISTRY_BACKEND == "sqlite":
+    print(f"[MAIN] Using SQLite registry store: {DEVICE_REGISTRY_DB_PATH}")
+    registry_store = SQLiteDeviceStore(DEVICE_REGISTRY_DB_PATH)
+registry_module.device_registry = DeviceRegistry(DEVICE_REGISTRY_PATH, store=registry_store)
 device_service = DeviceService(registry_module.device_registry)
+# Registry writes are deferred; make sure pending changes hit disk on exit
+atexit.register(registry_module.device_registry.flush_if_dirty)
 
 # Initialize catalog service
 catalog_service = CatalogService()
+# Shared with the blueprints via current_app.extensions
+app.extensions["catalog_service"] = catalog_service
 
 
 # Background thread to update device statuses
+STATUS_MONITOR_INTERVAL = 60  # seconds
+stop_event = threading.Event()
+
+
 def status_monitor_thread():
-    """Background thread to mark devices as offline when inactive."""
-    while True:
+    """Background thread to mark devices as offline when inactive.
+    
+    Also frees an idle Whisper model (see WHISPER_IDLE_TTL). Runs every
+    STATUS_MONITOR_INTERVAL seconds until stop_event is set.
+    """
+    while not stop_event.wait(STATUS_MONITOR_INTERVAL):
         try:
-            time.sleep(60)  # Check every minute
             device_service.update_statuses()
+            lm_routes.stt_service.evict_idle_model()
         except Exception as e:
             print(f"[MAIN] Status monitor error: {e}")
 
 
+def registry_flush_thread():
+    """Background thread that writes pending device registry changes.
+    
+    Request handlers only update the in-memory registry; this coalesces
+    their changes into one write every REGISTRY_FLUSH_INTERVAL seconds.
+    """
+    while not stop_event.wait(REGISTRY_FLUSH_INTERVAL):
+        try:
+            registry_module.device_registry.flush_if_dirty()
+        except Exception as e:
+            print(f"[MAIN] Registry flush error: {e}")
+
+
 # Middleware to auto-register and track device activity
+# Liveness/catalog polls never carry device state worth tracking
+UNTRACKED_ENDPOINTS = frozenset({'static', 'health.health', 'health.catalog'})
+
+
 @app.before_request
 def track_device_activity():
     """Auto-register device and update last_seen timestamp on each request.
     
-    Uses MAC address as primary device identifier.
+    Uses MAC address as primary device identifier. Requests to untracked
+    endpoints or without any device identifier header are skipped.
     """
-    if request.endpoint and request.endpoint != 'static':
-        mac_address = request.headers.get('X-Device-MAC')
-        
-        # If device already registered, update last_seen
-        if mac_address and registry_module.device_registry.get_device(mac_address):
-            device_service.update_activity(mac_address)
-        else:
-            # Try to auto-register from headers
-            device_service.auto_register_from_headers(
-                headers=dict(request.headers),
-                ip_address=request.remote_addr
-            )
+    if not request.endpoint or request.endpoint in UNTRACKED_ENDPOINTS:
+        return
+    
+    mac_address = request.headers.get('X-Device-MAC')
+    if not mac_address and not request.headers.get('X-Device-Id'):
+        return
+    
+    # If device already registered, update last_seen (one registry lookup)
+    if mac_address and device_service.update_activity(mac_address):
+        return
+    
+    # Otherwise try to auto-register from headers
+    device_service.auto_register_from_headers(
+        headers=request.headers,
+        ip_address=request.remote_addr
+    )
 
 
 # Register blueprints
@@ -87,6 +166,11 @@ app.register_blueprint(heartbeat_routes.bp)
 
 
 if __name__ == "__main__":
+    # Load the default Whisper model in the background so the server binds
+    # right away but the first transcription doesn't pay for the load. It
+    # starts first so the load overlaps the Gemini setup in update_catalog()
+    threading.Thread(target=lm_routes.stt_service.preload_default_model, daemon=True).start()
+    
     # Update catalog from libraries before starting server
     print("[MAIN] Updating model catalog...")
     catalog_service.update_catalog()
@@ -96,14 +180,47 @@ if __name__ == "__main__":
     print(f"[MAIN] Loaded devices: {stats['total_devices']} total, "
           f"{stats['online_devices']} online, {stats['offline_devices']} offline")
     
+    # Stop the monitor and exit normally on SIGTERM so the atexit flush runs.
+    # A repeated SIGTERM must not interrupt that flush halfway.
+    def handle_sigterm(signum, frame):
+        if stop_event.is_set():
+            return
+        stop_event.set()
+        raise SystemExit(0)
+    
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    
+    # SIGHUP re-reads secrets/apis.json, GEMINI_API_KEY and the model catalog (POSIX only)
+    def handle_sighup(signum, frame):
+        clear_api_key_cache()
+        GeminiLoader.reset_all()
+        catalog_service.invalidate_cache()
+    
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, handle_sighup)
+    
     # Start background status monitor thread
     monitor = threading.Thread(target=status_monitor_thread, daemon=True)
     monitor.start()
     print("[MAIN] Status monitor thread started")
     
+    flusher = threading.Thread(target=registry_flush_thread, daemon=True)
+    flusher.start()
+    print("[MAIN] Registry flush thread started")
+    
     # Start server
     print("\n" + "="*50)
     print("FlaskServer_v6 is running!")
     print("Endpoints: /health, /catalog, /device/*, /lm/generate, /lm/query, /stt/transcribe, /ai/process")
     print("="*50 + "\n")
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    if DEBUG:
+        app.run(host=SERVER_HOST, port=SERVER_PORT, debug=True)
+    else:
+        from waitress import serve
+        serve(
+            app,
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            threads=SERVER_THREADS,
+            outbuf_high_watermark=SERVER_OUTBUF_HIGH_WATERMARK,
+        )
@@ -4,32 +4,153 @@ This model handles ONLY data storage and retrieval.
 Business logic has been moved to services/device_service.py.
 """
 
-import json
+import hashlib
+import heapq
+import logging
+import re
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
 from threading import Lock
 
+import orjson
+
+from core.rwlock import RWLock
+from core.utils import atomic_write_bytes, load_json
+from models.device_store import SQLiteDeviceStore
+
+logger = logging.getLogger(__name__)
+
+# Colon-separated hardware address, e.g. 'AA:BB:CC:DD:EE:FF'
+MAC_RE = re.compile(r'(?:[0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}')
+
 
 class DeviceRegistry:
-    """Manages device data persistence with JSON storage.
+    """Manages device data persistence with JSON or SQLite storage.
     
     Uses MAC address as PRIMARY KEY for device identification.
     Devices persist across app reinstalls and OS updates.
     """
 
-    def __init__(self, storage_path: Path):
+    # Online devices not seen for this long are marked offline
+    OFFLINE_AFTER_SECONDS = 120
+
+    def __init__(self, storage_path: Path, store: Optional[SQLiteDeviceStore] = None):
         """Initialize device registry.
         
         Args:
             storage_path: Path to JSON storage file.
+            store: Optional SQLite store. When given it replaces the JSON
+                file, and flushes only write the records that changed.
         """
         self.storage_path = storage_path
+        self._store = store
         self.devices: Dict[str, dict] = {}
-        self._lock = Lock()
-        self._update_counter = 0
+        # Secondary indexes: mac_address / device_id field -> device key
+        self._by_mac: Dict[str, str] = {}
+        self._by_device_id: Dict[str, str] = {}
+        # Lookups share the lock; mutations and flushes take it exclusively
+        self._lock = RWLock()
+        # Set by mutations; cleared once the registry has been written out
+        self._dirty = False
+        # Keys of records changed since the last write (used by the SQLite store)
+        self._changed_keys: Set[str] = set()
+        # Bumped on every mutation so readers can tell if cached views are stale
+        self._version = 0
+        # (version, records newest first) from the last get_all_devices()
+        self._sorted_cache: Tuple[int, List[dict]] = (-1, [])
+        # Lower-cased name -> record, rebuilt lazily after name changes
+        self._name_index: Optional[Dict[str, dict]] = None
+        # Serializes JSON file writes, which happen outside self._lock;
+        # _written_version is the registry version last written out
+        self._write_lock = Lock()
+        self._written_version = -1
+        # Devices JSON of the last successful write, to skip identical rewrites
+        self._last_devices_json = b''
+        # (epoch second, ISO string) reused by _iso_now() within that second
+        self._now_cache = (0, '')
+        # Epoch seconds of each record's last_seen, kept in memory only so
+        # status checks compare numbers instead of parsing ISO strings
+        self._seen_at: Dict[str, float] = {}
+        # Min-heap of (offline-at epoch, device key) for online devices, at
+        # most one entry per key; update_device_statuses() only looks at
+        # entries that are due
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._expiry_scheduled: Set[str] = set()
         self.load_from_disk()
 
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever any device record changes."""
+        return self._version
+
+    def _mark_changed(self, *device_keys: str) -> None:
+        """Flag the registry for the next flush and invalidate cached views.
+        
+        Must be called with the lock held.
+        
+        Args:
+            device_keys: Keys of the records that changed.
+        """
+        self._dirty = True
+        self._changed_keys.update(device_keys)
+        self._version += 1
+
+    def _index(self, device_key: str, device: dict) -> None:
+        """Add a record to the secondary indexes."""
+        if device.get('mac_address'):
+            self._by_mac[device['mac_address']] = device_key
+        if device.get('device_id'):
+            self._by_device_id[device['device_id']] = device_key
+
+    def _unindex(self, device_key: str, device: dict) -> None:
+        """Drop index entries that still point at this record."""
+        if self._by_mac.get(device.get('mac_address')) == device_key:
+            del self._by_mac[device['mac_address']]
+        if self._by_device_id.get(device.get('device_id')) == device_key:
+            del self._by_device_id[device['device_id']]
+
+    def _iso_now(self) -> str:
+        """Current local time as an ISO string, formatted at most once per second."""
+        second = int(time.time())
+        if second != self._now_cache[0]:
+            self._now_cache = (second, datetime.fromtimestamp(second).isoformat())
+        return self._now_cache[1]
+
+    def _record_seen(self, device_key: str, seen_at: Optional[float] = None) -> None:
+        """Note when an online device was seen and queue its offline check.
+        
+        The queued time may go stale as the device keeps checking in;
+        update_device_statuses() re-reads _seen_at when the entry comes due.
+        Must be called with the lock held.
+        
+        Args:
+            device_key: Key of the record.
+            seen_at: Epoch seconds of its last_seen; defaults to the second
+                of the last _iso_now() call.
+        """
+        if seen_at is None:
+            seen_at = self._now_cache[0]
+        self._seen_at[device_key] = seen_at
+        if device_key not in self._expiry_scheduled:
+            heapq.heappush(self._expiry_heap, (seen_at + self.OFFLINE_AFTER_SECONDS, device_key))
+            self._expiry_scheduled.add(device_key)
+
+    def _find(self, identifier: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Look up a record by device key, MAC address or device_id.
+        
+        Returns:
+            (device key, record), or (None, None) if not registered.
+        """
+        device = self.devices.get(identifier)
+        if device is not None:
+            return identifier, device
+        device_key = self._by_mac.get(identifier) or self._by_device_id.get(identifier)
+        if device_key is None:
+            return None, None
+        return device_key, self.devices[device_key]
+
     def register_device(
         self,
         device_id: str,
@@ -53,37 +174,17 @@ class DeviceRegistry:
         Raises:
             ValueError: If MAC address is invalid or missing.
         """
-        with self._lock:
-            now = datetime.now().isoformat()
-            
-            # Validate and determine device key
-            # Priority: MAC address > device_id
-            device_key = None
-            
-            # Try to get valid MAC address
-            if mac_address and mac_address != 'null':
-                if ':' in mac_address and len(mac_address.split(':')) == 6:
-                    if not mac_address.startswith(('192.168', '10.', '172.')):
-                        device_key = mac_address
-                        print(f"[DEVICE] Using MAC as key: {mac_address}")
-            
-            # Fallback to device_id if MAC is not available
-            if not device_key:
-                if device_id and device_id != 'unknown' and device_id != 'null':
-                    device_key = device_id
-                    print(f"[DEVICE] Using device_id as key (no valid MAC): {device_id}")
-                    print(f"[DEVICE] Note: This device may duplicate on app reinstall")
-                else:
-                    # Last resort: create a temp key (will be problematic but allows registration)
-                    import hashlib
-                    temp_key = f"temp-{hashlib.md5(f'{device_name}{model_name}'.encode()).hexdigest()[:12]}"
-                    device_key = temp_key
-                    print(f"[DEVICE] No valid identifier - using temporary key: {temp_key}")
-                    print(f"[DEVICE] WARNING: Fix MAC address extraction in mobile app!")
+        # The key only depends on the arguments, so it is worked out before
+        # taking the lock
+        device_key = self._device_key(device_id, device_name, model_name, mac_address)
+        
+        with self._lock.write_locked():
+            now = self._iso_now()
             
             # Check if device exists
             if device_key in self.devices:
                 existing = self.devices[device_key]
+                self._unindex(device_key, existing)
                 has_custom_name = existing.get('has_custom_name', False)
                 
                 # Update existing device
@@ -119,73 +220,89 @@ class DeviceRegistry:
                 }
             
             self.devices[device_key] = device_record
-            self.save_to_disk()
+            self._index(device_key, device_record)
+            self._name_index = None
+            self._mark_changed(device_key)
+            self._record_seen(device_key)
             
             return device_record
 
-    def update_last_seen(self, mac_address: str):
-        """Update device last_seen timestamp.
+    @classmethod
+    def _device_key(
+        cls,
+        device_id: str,
+        device_name: str,
+        model_name: str,
+        mac_address: Optional[str],
+    ) -> str:
+        """Pick the registry key for a registration.
         
-        Args:
-            mac_address: Device hardware MAC address (primary key).
+        Priority: MAC address > device_id > temporary key derived from the
+        device name and model.
         """
-        with self._lock:
-            if mac_address in self.devices:
-                self.devices[mac_address]['last_seen'] = datetime.now().isoformat()
-                self.devices[mac_address]['status'] = 'online'
-                
-                # Save periodically to reduce disk I/O
-                self._update_counter += 1
-                if self._update_counter % 10 == 0:
-                    self.save_to_disk()
+        # Try to get valid MAC address
+        if cls._is_valid_mac(mac_address):
+            logger.debug("Using MAC as key: %s", mac_address)
+            return mac_address
+        
+        # Fallback to device_id if MAC is not available
+        if device_id and device_id != 'unknown' and device_id != 'null':
+            logger.debug("Using device_id as key (no valid MAC; may duplicate on app reinstall): %s", device_id)
+            return device_id
+        
+        # Last resort: create a temp key (will be problematic but allows registration).
+        # MD5 rather than hash() so the key stays the same across restarts.
+        temp_key = f"temp-{hashlib.md5(f'{device_name}{model_name}'.encode()).hexdigest()[:12]}"
+        logger.warning(
+            "No valid identifier - using temporary key %s (fix MAC address extraction in the mobile app)",
+            temp_key,
+        )
+        return temp_key
+
+    @staticmethod
+    def _is_valid_mac(mac_address: Optional[str]) -> bool:
+        """Check that a value looks like a colon-separated MAC, not an IP or 'null'.
+        
+        MAC_RE only matches hex octets, so IP addresses and 'null' fail it
+        without separate checks.
+        """
+        return bool(mac_address) and MAC_RE.fullmatch(mac_address) is not None
 
-    def auto_register_from_headers(self, headers: dict, ip_address: str) -> Optional[dict]:
+    def auto_register_from_headers(self, headers: Mapping[str, str], ip_address: str) -> Optional[dict]:
         """Auto-register or update device from request headers.
         
         Args:
-            headers: Request headers dictionary.
+            headers: Request headers (any mapping with ``.get``, e.g. the
+                request's own headers object; no copy is needed). Plain
+                dicts must use the canonical names, e.g. 'X-Device-MAC'.
             ip_address: Client IP address.
             
         Returns:
             Device record if registered, None otherwise.
         """
-        print(f"\n[AUTO-REGISTER] Extracting device info from headers...")
-        print("="*80)
-        print(f"  Headers: {headers}, ip_address: {ip_address}")
-        print("="*80)
-        
         device_id = headers.get('X-Device-Id')
         device_name = headers.get('X-Device-Name') or 'Unknown Device'
         model_name = headers.get('X-Device-Model') or 'Unknown Model'
         
-        # Flask normalizes headers to title case, so check both variations
-        mac_address = headers.get('X-Device-MAC') or headers.get('X-Device-Mac')
-        
-        print(f"[AUTO-REGISTER] Extracted values:")
-        print(f"  X-Device-Id: {device_id}")
-        print(f"  X-Device-Name: {device_name}")
-        print(f"  X-Device-Model: {model_name}")
-        print(f"  X-Device-MAC (or X-Device-Mac): {mac_address}")
-        print(f"  ip_address: {ip_address}")
+        # Request headers are case-insensitive, so one lookup covers 'X-Device-Mac'
+        mac_address = headers.get('X-Device-MAC')
         
         if not mac_address or mac_address == 'null':
-            print(f"[AUTO-REGISTER] No valid MAC address - cannot auto-register")
-            print(f"  Checking device_id fallback: {device_id}")
-            
             # Try with device_id as fallback
-            if device_id and device_id != 'null' and device_id != 'unknown':
-                print(f"[AUTO-REGISTER] Using device_id as identifier: {device_id}")
-                mac_address = None  # Let register_device handle fallback
-            else:
-                print(f"[AUTO-REGISTER] ❌ No valid identifier available")
+            if not device_id or device_id in ('null', 'unknown'):
                 return None
+            mac_address = None  # Let register_device handle fallback
+        
+        logger.debug(
+            "Auto-register headers: id=%s name=%s model=%s mac=%s ip=%s",
+            device_id, device_name, model_name, mac_address, ip_address,
+        )
         
         if not device_id:
             device_id = f'device-{mac_address or "unknown"}'
-            print(f"[AUTO-REGISTER] Generated device_id: {device_id}")
+            logger.debug("Generated device_id: %s", device_id)
         
         try:
-            print(f"[AUTO-REGISTER] Calling register_device()...")
             device = self.register_device(
                 device_id=device_id,
                 device_name=device_name,
@@ -193,49 +310,81 @@ class DeviceRegistry:
                 ip_address=ip_address,
                 mac_address=mac_address
             )
-            print(f"[AUTO-REGISTER] ✅ Registration successful")
             return device
         except ValueError as e:
-            print(f"[AUTO-REGISTER] ❌ Registration failed: {e}")
+            logger.warning("Auto-registration failed: %s", e)
             return None
 
     def update_device_statuses(self):
         """Update status to offline for devices not seen recently.
         
-        Devices are marked offline after 2 minutes of inactivity.
-        Devices are NEVER automatically removed.
+        Devices are marked offline after OFFLINE_AFTER_SECONDS (2 minutes) of
+        inactivity. Only devices whose expiry entry is due are examined, so
+        a tick with nothing due costs O(1) instead of a full sweep.
+        Devices are NEVER automatically removed. The registry is marked
+        changed once per sweep; the flusher thread writes it.
         """
-        with self._lock:
-            now = datetime.now()
-            offline_threshold = timedelta(minutes=2)
+        with self._lock.write_locked():
+            now = time.time()
+            heap = self._expiry_heap
+            went_offline = []
             
-            for mac_address, device in self.devices.items():
-                last_seen_str = device.get('last_seen')
-                if not last_seen_str:
+            while heap and heap[0][0] < now:
+                _, device_key = heapq.heappop(heap)
+                self._expiry_scheduled.discard(device_key)
+                device = self.devices.get(device_key)
+                if device is None or device.get('status') != 'online':
                     continue
                 
-                try:
-                    last_seen = datetime.fromisoformat(last_seen_str)
-                    time_since_seen = now - last_seen
-                    
-                    if time_since_seen > offline_threshold:
-                        if device['status'] == 'online':
-                            device['status'] = 'offline'
-                            self.save_to_disk()
-                
-                except ValueError:
-                    pass
+                expires_at = self._seen_at.get(device_key, 0) + self.OFFLINE_AFTER_SECONDS
+                if expires_at < now:
+                    device['status'] = 'offline'
+                    went_offline.append(device_key)
+                else:
+                    # Seen again since the entry was queued: check back later
+                    heapq.heappush(heap, (expires_at, device_key))
+                    self._expiry_scheduled.add(device_key)
+            
+            if went_offline:
+                self._mark_changed(*went_offline)
 
     def get_all_devices(self) -> List[dict]:
         """Get all registered devices sorted by last_seen (newest first).
         
+        The sort is reused until the registry version changes, so repeated
+        polls between updates only copy the list.
+        
         Returns:
             List of device records.
         """
-        with self._lock:
-            devices_list = list(self.devices.values())
-            devices_list.sort(key=lambda d: d.get('last_seen', ''), reverse=True)
-            return devices_list
+        with self._lock.read_locked():
+            version, devices_list = self._sorted_cache
+            if version != self._version:
+                devices_list = sorted(self.devices.values(), key=lambda d: d.get('last_seen', ''), reverse=True)
+                self._sorted_cache = (self._version, devices_list)
+            return list(devices_list)
+
+    def get_name_index(self) -> Dict[str, dict]:
+        """Get a lookup of lower-cased custom and auto names to device records.
+        
+        Built on first use after a registration or custom-name change. When
+        names collide, the most recently seen device wins.
+        
+        Returns:
+            Dictionary mapping stripped lower-case names to device records.
+        """
+        with self._lock.read_locked():
+            # Concurrent readers may both build it; the results are identical
+            if self._name_index is None:
+                index = {}
+                devices = sorted(self.devices.values(), key=lambda d: d.get('last_seen', ''), reverse=True)
+                for device in devices:
+                    for name in (device.get('custom_name'), device.get('device_name')):
+                        name = (name or '').lower().strip()
+                        if name:
+                            index.setdefault(name, device)
+                self._name_index = index
+            return self._name_index
 
     def get_device(self, identifier: str) -> Optional[dict]:
         """Get device by MAC address or device_id.
@@ -246,17 +395,8 @@ class DeviceRegistry:
         Returns:
             Device record or None if not found.
         """
-        with self._lock:
-            # Try MAC address first
-            if identifier in self.devices:
-                return self.devices[identifier]
-            
-            # Fallback: search by device_id
-            for mac, device in self.devices.items():
-                if device.get('device_id') == identifier:
-                    return device
-            
-            return None
+        with self._lock.read_locked():
+            return self._find(identifier)[1]
     
     def update_device_custom_name(
         self,
@@ -274,25 +414,12 @@ class DeviceRegistry:
         Returns:
             Updated device record or None if device not found.
         """
-        with self._lock:
-            device_key = None
-            device = None
-            
-            # Find device
-            if identifier in self.devices:
-                device_key = identifier
-                device = self.devices[identifier]
-            else:
-                for mac, dev in self.devices.items():
-                    if dev.get('device_id') == identifier:
-                        device_key = mac
-                        device = dev
-                        break
-            
-            if not device:
+        with self._lock.write_locked():
+            device_key, device = self._find(identifier)
+            if device is None:
                 return None
             
-            now = datetime.now().isoformat()
+            now = self._iso_now()
             
             # Update custom name fields
             device['custom_name'] = custom_name
@@ -300,7 +427,8 @@ class DeviceRegistry:
             device['custom_name_updated_at'] = now
             device['custom_name_updated_by'] = updated_by_device_id
             
-            self.save_to_disk()
+            self._name_index = None
+            self._mark_changed(device_key)
             
             return device
     
@@ -313,22 +441,9 @@ class DeviceRegistry:
         Returns:
             Updated device record or None if device not found.
         """
-        with self._lock:
-            device_key = None
-            device = None
-            
-            # Find device
-            if identifier in self.devices:
-                device_key = identifier
-                device = self.devices[identifier]
-            else:
-                for mac, dev in self.devices.items():
-                    if dev.get('device_id') == identifier:
-                        device_key = mac
-                        device = dev
-                        break
-            
-            if not device:
+        with self._lock.write_locked():
+            device_key, device = self._find(identifier)
+            if device is None:
                 return None
             
             # Clear custom name fields
@@ -337,7 +452,8 @@ class DeviceRegistry:
             device['custom_name_updated_at'] = None
             device['custom_name_updated_by'] = None
             
-            self.save_to_disk()
+            self._name_index = None
+            self._mark_changed(device_key)
             
             return device
 
@@ -350,58 +466,156 @@ class DeviceRegistry:
         Returns:
             True if device was found and updated, False otherwise
         """
-        with self._lock:
-            device = None
-            
-            # Try MAC address first (fastest lookup)
-            if identifier in self.devices:
-                device = self.devices[identifier]
-            else:
-                # Try device_id lookup
-                for dev in self.devices.values():
-                    if dev.get('device_id') == identifier:
-                        device = dev
-                        break
+        with self._lock.write_locked():
+            device_key, device = self._find(identifier)
             
-            if not device:
-                print(f"[DEVICE] Cannot update last_seen: device {identifier} not found")
+            # Unknown devices are normal here (callers auto-register them)
+            if device is None:
                 return False
             
             # Update timestamp and status
-            device['last_seen'] = datetime.now().isoformat()
+            device['last_seen'] = self._iso_now()
             device['status'] = 'online'
+            self._mark_changed(device_key)
+            self._record_seen(device_key)
+            
+            return True
+
+    def update_last_seen_many(self, identifiers: Iterable[str]) -> Set[str]:
+        """Update last_seen for several devices in one pass.
+        
+        Takes the lock once and stamps every device with the same timestamp.
+        
+        Args:
+            identifiers: MAC addresses and/or device_ids
+        
+        Returns:
+            Set of identifiers that were found and updated
+        """
+        with self._lock.write_locked():
+            now = self._iso_now()
+            updated = set()
+            updated_keys = []
+            
+            for identifier in identifiers:
+                device_key, device = self._find(identifier)
+                if device is None:
+                    continue
+                
+                device['last_seen'] = now
+                device['status'] = 'online'
+                updated.add(identifier)
+                updated_keys.append(device_key)
+                self._record_seen(device_key)
             
-            # Save to disk (throttled to avoid excessive writes)
-            self._update_counter += 1
-            if self._update_counter % 5 == 0:  # Save every 5th update
-                self.save_to_disk()
+            if updated:
+                self._mark_changed(*updated_keys)
             
+            return updated
+
+    def flush_if_dirty(self) -> bool:
+        """Write the registry to disk if it changed since the last write.
+        
+        Mutations only mark the registry dirty; this is called every few
+        seconds by the registry flusher thread and once more at shutdown.
+        For the JSON file only the serialization happens under the lock;
+        the file write does not block request threads.
+        
+        Returns:
+            True if a write happened, False otherwise.
+        """
+        with self._lock.write_locked():
+            if not self._dirty:
+                return False
+            if self._store is not None:
+                if self._save_to_store():
+                    self._dirty = False
+                    return True
+                return False
+            
+            serialized = self._serialize()
+            version = self._version
+            self._dirty = False
+            self._changed_keys.clear()
+        
+        if serialized is None:
+            return False
+        if self._write_json(*serialized, version):
             return True
+        
+        # Retry on the next flush
+        with self._lock.write_locked():
+            self._dirty = True
+        return False
+
+    def _serialize(self) -> Optional[Tuple[bytes, bytes]]:
+        """Serialize the registry for the JSON file (lock must be held).
+        
+        The file is only read back by the server, so it is written compact.
+        
+        Returns:
+            (devices JSON, file contents), or None if the devices are
+            identical to the last successful write.
+        """
+        devices_json = orjson.dumps(self.devices)
+        if devices_json == self._last_devices_json:
+            return None
+        last_updated = orjson.dumps(datetime.now().isoformat())
+        return devices_json, b'{"devices":' + devices_json + b',"last_updated":' + last_updated + b'}'
+
+    def _write_json(self, devices_json: bytes, payload: bytes, version: int) -> bool:
+        """Write a serialized snapshot unless a newer one is already on disk."""
+        with self._write_lock:
+            if version < self._written_version:
+                return True
+            try:
+                # Readers (and a crash mid-write) never see a truncated registry
+                atomic_write_bytes(self.storage_path, payload)
+                self._written_version = version
+                self._last_devices_json = devices_json
+                return True
+            except Exception as e:
+                # The old registry is intact
+                logger.error("Failed to save registry: %s", e)
+                return False
 
-    def save_to_disk(self):
-        """Persist registry to JSON file."""
+    def _save_to_store(self) -> bool:
+        """Write only the records changed since the last save to SQLite."""
+        keys = [k for k in self._changed_keys if k in self.devices]
         try:
-            data = {
-                'devices': self.devices,
-                'last_updated': datetime.now().isoformat()
-            }
-            with self.storage_path.open('w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._store.upsert_many((k, self.devices[k]) for k in keys)
+            self._changed_keys.clear()
+            return True
         except Exception as e:
-            print(f"[DEVICE] Failed to save registry: {e}")
+            logger.error("Failed to save registry: %s", e)
+            return False
 
     def load_from_disk(self):
-        """Load registry from JSON file."""
-        if not self.storage_path.exists():
+        """Load registry from the SQLite store or the JSON file."""
+        if self._store is not None:
+            try:
+                self.devices = self._store.load_all()
+            except Exception as e:
+                logger.error("Failed to load registry: %s", e)
+                self.devices = {}
+        elif not self.storage_path.exists():
             return
-        
-        try:
-            with self.storage_path.open('r', encoding='utf-8') as f:
-                data = json.load(f)
+        else:
+            try:
+                data = load_json(self.storage_path)
                 self.devices = data.get('devices', {})
-        except Exception as e:
-            print(f"[DEVICE] Failed to load registry: {e}")
-            self.devices = {}
+            except Exception as e:
+                logger.error("Failed to load registry: %s", e)
+                self.devices = {}
+        
+        for device_key, device in self.devices.items():
+            self._index(device_key, device)
+            if device.get('status') != 'online':
+                continue
+            try:
+                self._record_seen(device_key, datetime.fromisoformat(device['last_seen']).timestamp())
+            except (KeyError, TypeError, ValueError):
+                pass
 
     def get_stats(self) -> dict:
         """Get registry statistics.
@@ -409,7 +623,7 @@ class DeviceRegistry:
         Returns:
             Dictionary with total, online, and offline device counts.
         """
-        with self._lock:
+        with self._lock.read_locked():
             total = len(self.devices)
             online = sum(1 for d in self.devices.values() if d.get('status') == 'online')
             offline = total - online
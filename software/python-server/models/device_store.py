@@ -0,0 +1,96 @@
+"""SQLite persistence backend for the device registry.
+
+The in-memory ``DeviceRegistry.devices`` dict stays the source of truth;
+this store only replaces the JSON file as the place it is persisted to.
+Flushes write the rows that changed instead of rewriting every record.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+# Record fields, in column order (device_key is the primary key)
+COLUMNS = (
+    'device_id',
+    'device_name',
+    'custom_name',
+    'has_custom_name',
+    'custom_name_updated_at',
+    'custom_name_updated_by',
+    'model_name',
+    'ip_address',
+    'mac_address',
+    'status',
+    'first_seen',
+    'last_seen',
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS devices (
+    device_key TEXT PRIMARY KEY,
+    {', '.join(f'{c} TEXT' if c != 'has_custom_name' else f'{c} INTEGER' for c in COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS idx_devices_mac ON devices (mac_address);
+CREATE INDEX IF NOT EXISTS idx_devices_device_id ON devices (device_id);
+"""
+
+_UPSERT = (
+    f"INSERT OR REPLACE INTO devices (device_key, {', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})"
+)
+
+
+class SQLiteDeviceStore:
+    """Persists device records to a SQLite database in WAL mode.
+
+    Not thread-safe on its own; DeviceRegistry only calls it while holding
+    its lock.
+    """
+
+    def __init__(self, db_path: Path):
+        """Open (and create if needed) the registry database.
+
+        Args:
+            db_path: Path to the SQLite database file.
+        """
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes are grouped with explicit transactions
+        self._conn = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def load_all(self) -> Dict[str, dict]:
+        """Read every stored record.
+
+        Returns:
+            Dictionary mapping device key to device record.
+        """
+        devices = {}
+        rows = self._conn.execute(f"SELECT device_key, {', '.join(COLUMNS)} FROM devices")
+        for row in rows:
+            record = dict(zip(COLUMNS, row[1:]))
+            record['has_custom_name'] = bool(record['has_custom_name'])
+            devices[row[0]] = record
+        return devices
+
+    def upsert_many(self, items: Iterable[Tuple[str, dict]]) -> None:
+        """Insert or replace records in a single transaction.
+
+        Args:
+            items: (device_key, device_record) pairs.
+        """
+        rows = [
+            (key, *(record.get(c) for c in COLUMNS))
+            for key, record in items
+        ]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, rows)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
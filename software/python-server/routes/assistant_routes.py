@@ -1,11 +1,23 @@
 """Assistant routes - handles two-pass LLM pipeline requests."""
 
-from flask import Blueprint, request, jsonify, Response, stream_with_context
+import logging
+
+import orjson
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context
+from core.utils import SSE_CHUNK_PREFIX, SSE_CHUNK_SUFFIX, coalesce_text, sse_event
 from services.assistant_service import AssistantService
 from services.lm_service import LMService
 import models.device_model as registry_module
 
 bp = Blueprint('assistant', __name__)
+logger = logging.getLogger(__name__)
+
+# Log banner, built once instead of on every request
+_BAR = "=" * 80
+
+# Fixed SSE frames, encoded once
+_STATUS_GENERATING_FRAME = sse_event("status", {"status": "generating"})
+_DONE_FRAME = sse_event("done", {"status": "complete"})
 
 # Initialize services (lazy initialization for assistant_service)
 assistant_service = None
@@ -41,9 +53,9 @@ def handle_assistant_request():
         source_mac = data.get('source_device_mac')
         lm_model = data.get('lm_model')
         
-        print("\n" + "="*80)
+        print("\n", _BAR, sep="")
         print("[ASSISTANT] POST /lm/query called")
-        print("="*80)
+        print(_BAR)
         print(f"[DEBUG] Request data:")
         print(f"  user_query: {user_query}")
         print(f"  source_device_mac: {source_mac}")
@@ -74,25 +86,23 @@ def handle_assistant_request():
         # Check if text-generation (streaming)
         if result.get('use_streaming'):
             print(f"[ASSISTANT] Streaming response for text-generation")
-            print("="*80 + "\n")
+            print(_BAR, "\n", sep="")
             # Return SSE stream
             return stream_text_generation(result['user_query'], lm_model)
         
         # bt-control or error: Return JSON
         if result.get('status') == 'error':
             print(f"[ASSISTANT] Error result: {result}")
-            print("="*80 + "\n")
+            print(_BAR, "\n", sep="")
             return jsonify(result), 500
         
         print(f"[ASSISTANT] Success result: {result.get('status')}")
-        print("="*80 + "\n")
+        print(_BAR, "\n", sep="")
         return jsonify(result), 200
     
     except Exception as e:
-        print(f"[ASSISTANT_ROUTES] Error: {e}")
-        import traceback
-        traceback.print_exc()
-        print("="*80 + "\n")
+        logger.exception("assistant request failed")
+        print(_BAR, "\n", sep="")
         
         return jsonify({
             "status": "error",
@@ -113,19 +123,16 @@ def stream_text_generation(user_query: str, lm_model: str = None):
     Returns:
         SSE stream response
     """
+    # Resolved here, while the request context is active, not per stream
+    model_identifier = current_app.extensions["catalog_service"].resolve_lm_model(lm_model)
+    
     def generate():
         try:
-            import json
-            from services.catalog_service import CatalogService
-            
-            catalog_service = CatalogService()
-            model_identifier = catalog_service.resolve_lm_model(lm_model)
-            
             print(f"[STREAMING] Resolved Gemini model: {model_identifier}")
             print(f"[STREAMING] User query: {user_query}")
             
             # Status event
-            yield f"event: status\ndata: {json.dumps({'status': 'generating'})}\n\n"
+            yield _STATUS_GENERATING_FRAME
             
             # Generate streaming response
             response = lm_service.generate_content(
@@ -134,19 +141,21 @@ def stream_text_generation(user_query: str, lm_model: str = None):
                 stream=True
             )
             
+            # Single-token chunks are merged so each frame carries more text
             chunk_count = 0
-            for chunk in response:
-                if chunk.text:
-                    chunk_count += 1
-                    yield f"event: data\ndata: {json.dumps({'chunk': chunk.text})}\n\n"
+            for text in coalesce_text(chunk.text for chunk in response):
+                chunk_count += 1
+                # Only the chunk text needs escaping; the frame around it is fixed
+                yield SSE_CHUNK_PREFIX + orjson.dumps(text) + SSE_CHUNK_SUFFIX
             
             print(f"[STREAMING] Completed - sent {chunk_count} chunks")
             
             # Done event
-            yield f"event: done\ndata: {json.dumps({'status': 'complete'})}\n\n"
+            yield _DONE_FRAME
         
         except Exception as e:
             print(f"[STREAMING] Error: {e}")
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event("error", {"error": str(e)})
     
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Every frame is already bytes, so Werkzeug can pass them through as-is
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', direct_passthrough=True)
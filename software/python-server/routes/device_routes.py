@@ -1,11 +1,34 @@
 """Device Management Routes - Handles device registration and lookup."""
 
-from flask import Blueprint, request, jsonify
+import logging
+import time
+
+import orjson
+from flask import Blueprint, Response, request, jsonify
 from urllib.parse import unquote
+from core.utils import orjsonify
 import models.device_model as registry_module
 
 
 bp = Blueprint("device", __name__)
+logger = logging.getLogger(__name__)
+
+# Serialized /device/list body, reused while the registry is unchanged
+LIST_CACHE_TTL = 30  # seconds
+_list_cache = (None, 0.0, b"")  # (registry version, built at, body)
+
+# Above this many devices /device/list is streamed instead of cached
+LIST_STREAM_THRESHOLD = 1000
+
+
+def _stream_device_list(devices, stats):
+    """Yield the /device/list JSON body one device at a time."""
+    yield b'{"status":"success","devices":['
+    for i, device in enumerate(devices):
+        if i:
+            yield b","
+        yield orjson.dumps(device)
+    yield b'],"count":%d,"stats":%s}' % (len(devices), orjson.dumps(stats))
 
 
 @bp.post("/device/register")
@@ -27,54 +50,41 @@ def register_device():
         "device": {...device_record...}
     }
     """
-    print("\n" + "="*80)
-    print("[REGISTRATION] POST /device/register called")
-    print("="*80)
+    logger.debug("POST /device/register called")
     
     if registry_module.device_registry is None:
         return jsonify(error="Device registry not initialized"), 500
     
-    payload = request.get_json() or {}
-    
-    # DEBUG: Print all headers
-    print("\n[DEBUG] Request Headers:")
-    for header_name, header_value in request.headers:
-        print(f"  {header_name}: {header_value}")
+    payload = request.get_json(silent=True) or {}
     
-    # DEBUG: Print request body
-    print(f"\n[DEBUG] Request Body (JSON):")
-    print(f"  Raw payload: {payload}")
+    logger.debug("Request body: %s", payload)
     
     device_id = payload.get("device_id")
     device_name = payload.get("device_name")
     model_name = payload.get("model_name")
     mac_address = payload.get("mac_address")
     
-    print(f"\n[DEBUG] Extracted Fields:")
-    print(f"  device_id: {device_id}")
-    print(f"  device_name: {device_name}")
-    print(f"  model_name: {model_name}")
-    print(f"  mac_address: {mac_address}")
-    print(f"  remote_addr: {request.remote_addr}")
+    logger.debug(
+        "Extracted fields: device_id=%s device_name=%s model_name=%s mac_address=%s remote_addr=%s",
+        device_id, device_name, model_name, mac_address, request.remote_addr
+    )
     
     # Validation
     if not all([device_id, device_name, model_name]):
-        print(f"\n[ERROR] Validation failed - missing required fields")
-        print(f"  device_id present: {bool(device_id)}")
-        print(f"  device_name present: {bool(device_name)}")
-        print(f"  model_name present: {bool(model_name)}")
+        logger.warning(
+            "Registration rejected - missing fields (device_id=%s, device_name=%s, model_name=%s)",
+            bool(device_id), bool(device_name), bool(model_name)
+        )
         return jsonify(error="Missing required fields: device_id, device_name, model_name"), 400
     
     # Use client-provided IP address if available (for BT devices, this contains parent phone model)
     # Otherwise fall back to request IP address (for Wi-Fi devices)
     ip_address = payload.get("ip_address") or request.remote_addr
     
-    print(f"\n[DEBUG] Registration Parameters:")
-    print(f"  ip_address: {ip_address}")
+    logger.debug("Registration ip_address: %s", ip_address)
     
     # Register device
     try:
-        print(f"\n[REGISTRATION] Calling device_registry.register_device()...")
         device_record = registry_module.device_registry.register_device(
             device_id=device_id,
             device_name=device_name,
@@ -83,19 +93,16 @@ def register_device():
             mac_address=mac_address
         )
         
-        print(f"[SUCCESS] Device registered successfully:")
-        print(f"  Device record: {device_record}")
-        print("="*80 + "\n")
+        logger.debug("Device registered: %s", device_record)
         
-        return jsonify({
+        return orjsonify({
             "status": "success",
             "message": "Device registered",
             "device": device_record
-        }), 200
+        })
     
     except Exception as e:
-        print(f"\n[ERROR] Registration failed: {str(e)}")
-        print("="*80 + "\n")
+        logger.error("Registration failed: %s", e)
         return jsonify(error=f"Registration failed: {str(e)}"), 500
 
 
@@ -126,23 +133,41 @@ def list_devices():
             "inactive_devices": 1
         }
     }
+    
+    The serialized body is cached for LIST_CACHE_TTL seconds and rebuilt
+    as soon as the registry version changes. Registries larger than
+    LIST_STREAM_THRESHOLD are streamed per device and not cached, so the
+    full body is never held in memory.
     """
     if registry_module.device_registry is None:
         return jsonify(error="Device registry not initialized"), 500
     
     try:
+        global _list_cache
+        registry = registry_module.device_registry
+        
         # Update statuses before returning list
-        registry_module.device_registry.update_device_statuses()
+        registry.update_device_statuses()
         
-        devices = registry_module.device_registry.get_all_devices()
-        stats = registry_module.device_registry.get_stats()
+        version = registry.version
+        cached_version, built_at, body = _list_cache
+        if cached_version != version or time.monotonic() - built_at >= LIST_CACHE_TTL:
+            devices = registry.get_all_devices()
+            stats = registry.get_stats()
+            
+            if len(devices) > LIST_STREAM_THRESHOLD:
+                _list_cache = (None, 0.0, b"")
+                return Response(_stream_device_list(devices, stats), status=200, mimetype="application/json")
+            
+            body = orjson.dumps({
+                "status": "success",
+                "devices": devices,
+                "count": len(devices),
+                "stats": stats
+            })
+            _list_cache = (version, time.monotonic(), body)
         
-        return jsonify({
-            "status": "success",
-            "devices": devices,
-            "count": len(devices),
-            "stats": stats
-        }), 200
+        return Response(body, status=200, mimetype="application/json")
     
     except Exception as e:
         return jsonify(error=f"Failed to retrieve devices: {str(e)}"), 500
@@ -197,10 +222,12 @@ def update_device_name(device_id: str):
         return jsonify(error="Device registry not initialized"), 500
     
     try:
-        # URL decode the device_id (Flask may not decode it automatically)
-        device_id = unquote(device_id)
+        # URL decode the device_id (Flask may not decode it automatically);
+        # plain MACs/UUIDs have no escapes, so skip the scan for them
+        if '%' in device_id:
+            device_id = unquote(device_id)
         
-        payload = request.get_json() or {}
+        payload = request.get_json(silent=True) or {}
         
         custom_name = payload.get("custom_name")
         updated_by_device_id = payload.get("updated_by_device_id") or request.headers.get('X-Device-Id')
@@ -247,8 +274,9 @@ def clear_device_name(device_id: str):
         return jsonify(error="Device registry not initialized"), 500
     
     try:
-        # URL decode the device_id
-        device_id = unquote(device_id)
+        # URL decode the device_id (only if it carries escapes)
+        if '%' in device_id:
+            device_id = unquote(device_id)
         
         device = registry_module.device_registry.clear_device_custom_name(identifier=device_id)
         
@@ -1,19 +1,18 @@
 """Health and catalog endpoints."""
 
-from flask import Blueprint, jsonify
-from services.catalog_service import CatalogService
+from flask import Blueprint, Response, current_app, jsonify
 
 bp = Blueprint("health", __name__)
 
-# Initialize catalog service
-catalog_service = CatalogService()
-
-
 @bp.get("/catalog")
 def catalog():
-    """Return the model catalog with status wrapper."""
-    catalog_data = catalog_service.get_catalog_for_app()
-    return jsonify({"status": "success", "data": catalog_data}), 200
+    """Return the model catalog with status wrapper.
+    
+    The body is serialized once per catalog version by CatalogService,
+    which also notices catalog file changes and update_catalog() rebuilds.
+    """
+    body = current_app.extensions["catalog_service"].get_catalog_response_body()
+    return Response(body, status=200, mimetype="application/json")
 
 
 @bp.get("/health")
@@ -1,10 +1,13 @@
 """Heartbeat Routes - Device connection status updates."""
 
+import logging
+
 from flask import Blueprint, request, jsonify
 import models.device_model as registry_module
 
 
 bp = Blueprint("heartbeat", __name__)
+logger = logging.getLogger(__name__)
 
 
 @bp.post("/device/heartbeat")
@@ -28,46 +31,34 @@ def device_heartbeat():
         "device_mac": "AA:BB:CC:DD:EE:FF"
     }
     """
-    print("\n" + "="*80)
-    print("[HEARTBEAT] POST /device/heartbeat called")
-    print("="*80)
+    logger.debug("POST /device/heartbeat called")
     
     if registry_module.device_registry is None:
         return jsonify(error="Device registry not initialized"), 500
     
-    # DEBUG: Print all headers
-    print("\n[DEBUG] Request Headers:")
-    for header_name, header_value in request.headers:
-        print(f"  {header_name}: {header_value}")
-    
-    # Get device identifier from header (Flask normalizes to title case)
-    device_mac = request.headers.get('X-Device-MAC') or request.headers.get('X-Device-Mac')
+    # Get device identifier from header (header lookups are case-insensitive)
+    device_mac = request.headers.get('X-Device-MAC')
     device_id = request.headers.get('X-Device-Id')
     
     identifier = device_mac or device_id
     
-    print(f"\n[DEBUG] Extracted Identifiers:")
-    print(f"  X-Device-MAC (or X-Device-Mac): {device_mac}")
-    print(f"  X-Device-Id: {device_id}")
-    print(f"  Final identifier: {identifier}")
-    print(f"  remote_addr: {request.remote_addr}")
+    logger.debug(
+        "Extracted identifiers: mac=%s device_id=%s identifier=%s remote_addr=%s",
+        device_mac, device_id, identifier, request.remote_addr
+    )
     
     if not identifier:
-        print(f"[ERROR] No device identifier found in headers")
-        print("="*80 + "\n")
+        logger.warning("Heartbeat without device identifier from %s", request.remote_addr)
         return jsonify(error="Missing device identifier (X-Device-MAC or X-Device-Id)"), 400
     
     try:
-        # Update this device's last_seen
-        print(f"\n[HEARTBEAT] Attempting to update last_seen for: {identifier}")
-        updated = registry_module.device_registry.update_last_seen(identifier)
-        
-        print(f"[HEARTBEAT] update_last_seen result: {updated}")
+        payload = request.get_json(silent=True) or {}
+        connected_devices = payload.get('connected_devices', [])
+        logger.debug("Connected devices in payload: %s", connected_devices)
         
-        if not updated:
+        if not registry_module.device_registry.update_last_seen(identifier):
             # Device not found - try auto-registration from headers
-            print(f"[HEARTBEAT] Device {identifier} not found in registry")
-            print(f"[HEARTBEAT] Attempting auto-registration from headers...")
+            logger.debug("Device %s not in registry, attempting auto-registration", identifier)
             
             device = registry_module.device_registry.auto_register_from_headers(
                 headers=request.headers,
@@ -75,28 +66,20 @@ def device_heartbeat():
             )
             
             if device:
-                print(f"[SUCCESS] Auto-registered device: {device.get('device_name')} ({device.get('device_id')})")
-                updated = True
+                logger.info(
+                    "Auto-registered device: %s (%s)",
+                    device.get('device_name'), device.get('device_id')
+                )
             else:
-                print(f"[ERROR] Auto-registration failed for identifier: {identifier}")
-                print("="*80 + "\n")
+                logger.warning("Auto-registration failed for identifier: %s", identifier)
                 return jsonify(error="Device not found and auto-registration failed"), 404
-        else:
-            print(f"[SUCCESS] Updated last_seen for device: {identifier}")
         
-        # Update connected Bluetooth devices if provided
-        payload = request.get_json() or {}
-        connected_devices = payload.get('connected_devices', [])
-        
-        print(f"\n[DEBUG] Connected devices in payload: {connected_devices}")
-        
-        for bt_mac in connected_devices:
-            if bt_mac and bt_mac != identifier:
-                bt_updated = registry_module.device_registry.update_last_seen(bt_mac)
-                print(f"[HEARTBEAT] Updated connected BT device {bt_mac}: {bt_updated}")
-        
-        print(f"[SUCCESS] Heartbeat processed successfully")
-        print("="*80 + "\n")
+        # Refresh the connected Bluetooth devices in one batch, only once
+        # the sender is known
+        connected = {mac for mac in connected_devices if mac and mac != identifier}
+        if connected:
+            updated_ids = registry_module.device_registry.update_last_seen_many(connected)
+            logger.debug("update_last_seen_many(%s) -> %s", connected, updated_ids)
         
         return jsonify({
             "status": "success",
@@ -106,8 +89,7 @@ def device_heartbeat():
         }), 200
     
     except Exception as e:
-        print(f"\n[ERROR] Heartbeat failed: {str(e)}")
-        print("="*80 + "\n")
+        logger.error("Heartbeat failed: %s", e)
         return jsonify(error=f"Heartbeat failed: {str(e)}"), 500
 
 
@@ -133,23 +115,20 @@ def update_connection_status():
         return jsonify(error="Device registry not initialized"), 500
     
     try:
-        payload = request.get_json() or {}
+        payload = request.get_json(silent=True) or {}
         connected = payload.get('connected', [])
         disconnected = payload.get('disconnected', [])
         
-        updated_count = 0
-        
-        # Mark connected devices as online
-        for mac in connected:
-            if registry_module.device_registry.update_last_seen(mac):
-                updated_count += 1
+        # Mark connected devices as online (one lock, one shared timestamp)
+        updated = registry_module.device_registry.update_last_seen_many(connected)
+        updated_count = sum(1 for mac in connected if mac in updated)
         
         # Mark disconnected devices as offline immediately
         # (Don't wait for 2-minute timeout)
         for mac in disconnected:
             # Note: Would need to add a mark_offline method to device_model.py
             # For now, they'll just timeout naturally
-            print(f"[CONNECTION] Device disconnected: {mac}")
+            logger.debug("Device disconnected: %s", mac)
             updated_count += 1
         
         return jsonify({
@@ -1,18 +1,24 @@
 """Language Model (LM) endpoints for text generation."""
 
-import tempfile
-from flask import Blueprint, request, Response, stream_with_context, jsonify
+import logging
+
+import orjson
+from flask import Blueprint, current_app, request, Response, stream_with_context, jsonify
+from core.utils import SSE_CHUNK_PREFIX, SSE_CHUNK_SUFFIX, coalesce_text, sse_event
 from services.lm_service import LMService
 from services.stt_service import STTService
-from services.catalog_service import CatalogService
 import models.device_model as registry_module
 
 bp = Blueprint("lm", __name__)
+logger = logging.getLogger(__name__)
 
 # Initialize services
 lm_service = LMService()
 stt_service = STTService()
-catalog_service = CatalogService()
+
+# Fixed SSE frames, encoded once
+_STATUS_TRANSCRIBING_FRAME = sse_event("status", {"status": "transcribing"})
+_DONE_FRAME = sse_event("done", {"status": "complete"})
 
 
 @bp.post("/lm/generate")
@@ -36,7 +42,7 @@ def generate():
     
     try:
         # Resolve model identifier
-        model_identifier = catalog_service.resolve_lm_model(model_name)
+        model_identifier = current_app.extensions["catalog_service"].resolve_lm_model(model_name)
         
         if stream:
             # Stream response using SSE
@@ -111,32 +117,19 @@ def transcribe():
     # Track device activity
     if source_mac:
         registry_module.device_registry.update_last_seen(source_mac)
-        print(f"[TRANSCRIBE] Updated activity for device: {source_mac}")
+        logger.debug("Updated activity for device: %s", source_mac)
     
     try:
-        print(f"[TRANSCRIBE] Audio upload received")
-        print(f"[TRANSCRIBE] Model: {stt_model_name}")
-        
-        # Save audio to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            audio_file.save(tmp_file.name)
-            tmp_path = tmp_file.name
+        logger.debug("Transcribe: audio upload received, model %s", stt_model_name)
         
-        print(f"[TRANSCRIBE] Audio saved to: {tmp_path}")
-        
-        # Transcribe audio
-        print(f"[TRANSCRIBE] Starting transcription...")
+        # Transcribe straight from the upload stream (no temp file copy)
         transcription = stt_service.transcribe_audio(
-            audio_file_path=tmp_path,
+            audio_file_path=audio_file.stream,
             model_name=stt_model_name,
             language=language
         )
         
-        print(f"[TRANSCRIBE] Transcription: '{transcription[:100]}...'")
-        
-        # Clean up temp file
-        import os
-        os.remove(tmp_path)
+        logger.debug("Transcription: %.100r", transcription)
         
         if not transcription.strip():
             return jsonify({"error": "Empty transcription"}), 400
@@ -147,9 +140,7 @@ def transcribe():
         }), 200
     
     except Exception as e:
-        print(f"[TRANSCRIBE] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Transcription failed: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -189,29 +180,19 @@ def process():
         stream = request.form.get('stream', 'false').lower() == 'true'
         
         try:
-            print(f"[PROCESS] Audio upload received")
-            print(f"[PROCESS] Form data: stt_model_name={stt_model_name}, lm_model_name={lm_model_name}, stream={stream}")
-            
-            # Save audio to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                audio_file.save(tmp_file.name)
-                tmp_path = tmp_file.name
-            
-            print(f"[PROCESS] Audio saved to: {tmp_path}")
+            logger.debug(
+                "Process: audio upload received (stt_model_name=%s, lm_model_name=%s, stream=%s)",
+                stt_model_name, lm_model_name, stream,
+            )
             
-            # Transcribe audio
-            print(f"[PROCESS] Starting transcription with model: {stt_model_name}")
+            # Transcribe straight from the upload stream (no temp file copy)
             transcription = stt_service.transcribe_audio(
-                audio_file_path=tmp_path,
+                audio_file_path=audio_file.stream,
                 model_name=stt_model_name,
                 language=language
             )
             
-            print(f"[PROCESS] Transcription complete: '{transcription[:100]}...'")
-            
-            # Clean up temp file
-            import os
-            os.remove(tmp_path)
+            logger.debug("Transcription complete: %.100r", transcription)
             
             # Build final prompt
             if prompt_suffix:
@@ -220,31 +201,27 @@ def process():
                 final_prompt = transcription
             
             if not final_prompt.strip():
-                print(f"[PROCESS] Empty transcription!")
+                logger.debug("Empty transcription")
                 return jsonify({"error": "Empty transcription"}), 400
             
-            print(f"[PROCESS] Final prompt for LM: '{final_prompt[:100]}...'")
+            logger.debug("Final prompt for LM: %.100r", final_prompt)
             
             # Generate response with LM
-            model_identifier = catalog_service.resolve_lm_model(lm_model_name)
-            print(f"[PROCESS] Resolved LM model: {model_identifier}")
+            model_identifier = current_app.extensions["catalog_service"].resolve_lm_model(lm_model_name)
+            logger.debug("Resolved LM model: %s", model_identifier)
             
             if stream:
-                print(f"[PROCESS] Starting SSE stream...")
+                logger.debug("Starting SSE stream")
                 
                 # Stream response with proper SSE event format
                 def generate_stream():
-                    import json
                     try:
-                        print(f"[PROCESS] → Sending status: transcribing")
                         # Send status event
-                        yield f"event: status\ndata: {json.dumps({'status': 'transcribing'})}\n\n"
+                        yield _STATUS_TRANSCRIBING_FRAME
                         
-                        print(f"[PROCESS] → Sending transcription: {transcription[:50]}...")
                         # Send transcription event
-                        yield f"event: status\ndata: {json.dumps({'status': 'generating', 'transcription': transcription})}\n\n"
+                        yield sse_event("status", {"status": "generating", "transcription": transcription})
                         
-                        print(f"[PROCESS] → Starting LM generation...")
                         # Stream LM response chunks
                         response = lm_service.generate_content(
                             prompt=final_prompt,
@@ -252,28 +229,26 @@ def process():
                             stream=True
                         )
                         
+                        # Single-token chunks are merged so each frame carries more text
                         chunk_count = 0
-                        for chunk in response:
-                            if chunk.text:
-                                chunk_count += 1
-                                if chunk_count <= 3:  # Log first 3 chunks
-                                    print(f"[PROCESS] → Chunk {chunk_count}: '{chunk.text[:50]}...'")
-                                yield f"event: data\ndata: {json.dumps({'chunk': chunk.text})}\n\n"
+                        for text in coalesce_text(chunk.text for chunk in response):
+                            chunk_count += 1
+                            if chunk_count <= 3 and logger.isEnabledFor(logging.DEBUG):  # Log first 3 chunks
+                                logger.debug("Chunk %d: %.50r", chunk_count, text)
+                            yield SSE_CHUNK_PREFIX + orjson.dumps(text) + SSE_CHUNK_SUFFIX
                         
-                        print(f"[PROCESS] → Sent {chunk_count} chunks total")
-                        print(f"[PROCESS] → Sending done event")
+                        logger.debug("Stream complete, sent %d chunks", chunk_count)
                         # Send done event
-                        yield f"event: done\ndata: {json.dumps({'status': 'complete'})}\n\n"
-                        print(f"[PROCESS] Stream complete!")
+                        yield _DONE_FRAME
                     except Exception as e:
-                        print(f"[PROCESS] Stream error: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                        logger.exception("Stream error: %s", e)
+                        yield sse_event("error", {"error": str(e)})
                 
+                # Every frame is already bytes, so Werkzeug can pass them through as-is
                 return Response(
                     stream_with_context(generate_stream()),
-                    mimetype="text/event-stream"
+                    mimetype="text/event-stream",
+                    direct_passthrough=True
                 )
             else:
                 # Return complete response
@@ -303,7 +278,7 @@ def process():
             return jsonify({"error": "Missing 'prompt' field"}), 400
         
         try:
-            model_identifier = catalog_service.resolve_lm_model(lm_model_name)
+            model_identifier = current_app.extensions["catalog_service"].resolve_lm_model(lm_model_name)
             
             if stream:
                 # Stream response
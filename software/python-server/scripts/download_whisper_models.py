@@ -13,6 +13,7 @@ If you hit HF rate limits or private repo errors, set your token:
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -26,6 +27,10 @@ ROOT = Path(__file__).resolve().parent.parent
 CATALOG_PATH = ROOT / "models" / "model_catalog.json"
 DEST_ROOT = ROOT / "models" / "__models__" / "whisper"
 
+# Models downloaded at once, and files fetched at once within each model
+MAX_PARALLEL_MODELS = 4
+MAX_FILE_WORKERS = 8
+
 
 def repo_id_from_url(url: str) -> str:
     """Extract HF repo_id from a URL or return the string unchanged if already a repo id."""
@@ -38,12 +43,23 @@ def repo_id_from_url(url: str) -> str:
 
 def is_downloaded(dest: Path) -> bool:
     """Basic check whether model appears downloaded (some files exist)."""
-    if not dest.exists():
+    if not dest.is_dir():
         return False
-    # heuristics: any file inside dest
-    for _ in dest.rglob("*"):
-        return True
-    return False
+    # heuristics: any entry inside dest (stops at the first one, no recursion)
+    with os.scandir(dest) as entries:
+        return any(True for _ in entries)
+
+
+def download_model(model_name: str, repo_id: str, dest: Path) -> None:
+    """Download one model repo into dest (resumes a partial download)."""
+    print(f"Downloading {model_name} from {repo_id} → {dest} ...")
+    snapshot_download(
+        repo_id=repo_id,
+        local_dir=str(dest),
+        local_dir_use_symlinks=False,
+        resume_download=True,
+        max_workers=MAX_FILE_WORKERS,
+    )
 
 
 def main():
@@ -61,28 +77,38 @@ def main():
 
     DEST_ROOT.mkdir(parents=True, exist_ok=True)
 
+    pending = {}
     for model_name, repo_url in stt.items():
         try:
             repo_id = repo_id_from_url(repo_url)
-            dest = DEST_ROOT / model_name
-            if is_downloaded(dest):
-                print(f"Skipping {model_name} — already downloaded at {dest}")
-                continue
-
-            print(f"Downloading {model_name} from {repo_id} → {dest} ...")
-            snapshot_download(
-                repo_id=repo_id,
-                local_dir=str(dest),
-                local_dir_use_symlinks=False,
-                resume_download=True,
-            )
-            print(f"OK: {model_name} downloaded to {dest}\n")
-
-        except KeyboardInterrupt:
-            print("Interrupted by user")
-            return
         except Exception as e:
             print(f"ERROR downloading {model_name}: {e}\n")
+            continue
+        dest = DEST_ROOT / model_name
+        if is_downloaded(dest):
+            print(f"Skipping {model_name} — already downloaded at {dest}")
+            continue
+        pending[model_name] = (repo_id, dest)
+
+    # Downloads are network-bound, so fetch the models side by side
+    executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_MODELS)
+    try:
+        futures = {
+            executor.submit(download_model, model_name, repo_id, dest): model_name
+            for model_name, (repo_id, dest) in pending.items()
+        }
+        for future in as_completed(futures):
+            model_name = futures[future]
+            try:
+                future.result()
+                print(f"OK: {model_name} downloaded to {pending[model_name][1]}\n")
+            except Exception as e:
+                print(f"ERROR downloading {model_name}: {e}\n")
+    except KeyboardInterrupt:
+        print("Interrupted by user: pending downloads cancelled; in-progress ones will finish")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+    executor.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+"""Copy the JSON device registry into the SQLite registry store.
+
+Run once before starting the server with DEVICE_REGISTRY_BACKEND=sqlite.
+Existing rows with the same device key are replaced; the JSON file is left
+untouched.
+
+Usage (from project root):
+  python scripts\migrate_registry_to_sqlite.py
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import DEVICE_REGISTRY_PATH, DEVICE_REGISTRY_DB_PATH  # noqa: E402
+from core.utils import load_json  # noqa: E402
+from models.device_store import SQLiteDeviceStore  # noqa: E402
+
+
+def main() -> int:
+    if not DEVICE_REGISTRY_PATH.exists():
+        print(f"No JSON registry found at {DEVICE_REGISTRY_PATH}; nothing to migrate.")
+        return 0
+
+    devices = load_json(DEVICE_REGISTRY_PATH).get("devices", {})
+    store = SQLiteDeviceStore(DEVICE_REGISTRY_DB_PATH)
+    try:
+        store.upsert_many(devices.items())
+        total = len(store.load_all())
+    finally:
+        store.close()
+
+    print(f"Migrated {len(devices)} devices into {DEVICE_REGISTRY_DB_PATH} ({total} rows total).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Test the Local bt-control Fast Path
+Verifies which queries AssistantService answers without Pass 2, and that
+negated, conditional, delayed or questioning queries are left to Pass 2.
+
+Run from the python-server directory: python scripts/test_local_commands.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.device_model import DeviceRegistry
+from services.assistant_service import AssistantService
+
+OUTPUT_FORMAT = ["led:on", "led:off", "relay:on", "relay:off", "gripper:open", "gripper:close"]
+
+# query -> expected (command, device name), or None when Pass 2 must decide
+CASES = {
+    "turn on the led on car": ("led:on", "car"),
+    "switch the relay off on car": ("relay:off", "car"),
+    "open the gripper on arm": ("gripper:open", "arm"),
+    "please close the gripper on my arm.": ("gripper:close", "arm"),
+    "do not open the gripper on arm": None,
+    "don't turn on the led on car": None,
+    "never switch the relay off on car": None,
+    "should I turn on the led on car?": None,
+    "in five minutes turn off the relay on car": None,
+    "turn off the relay on car if it gets dark": None,
+    "turn on the led on car and arm": None,
+    "turn on the led": None,
+    "quickly turn on the led on car": None,
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = DeviceRegistry(Path(tmp) / "device_registry.json")
+        registry.register_device("car-1", "car", "BLE Device", "", "11:22:33:44:55:01")
+        registry.register_device("arm-1", "arm", "BLE Device", "", "11:22:33:44:55:02")
+        assistant = AssistantService(registry)
+
+        failures = 0
+        for query, expected in CASES.items():
+            result = assistant._local_bt_command(query, OUTPUT_FORMAT)
+            got = None if result is None else (result[0], result[1]["device_name"])
+            ok = got == expected
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {query!r}: {got} (expected {expected})")
+
+    print(f"\n{len(CASES) - failures}/{len(CASES)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
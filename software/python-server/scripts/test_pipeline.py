@@ -1,6 +1,7 @@
 """Test script to verify the complete pipeline works."""
 
 import sys
+from itertools import islice
 from pathlib import Path
 
 # Add src to path
@@ -24,7 +25,7 @@ print("\n[2] Testing Whisper models discovery...")
 try:
     whisper_models = core._get_whisper_models()
     print(f"✓ Found {len(whisper_models)} Whisper models:")
-    for key, value in list(whisper_models.items())[:5]:
+    for key, value in islice(whisper_models.items(), 5):
         print(f"  - {key}: {value}")
     if len(whisper_models) > 5:
         print(f"  ... and {len(whisper_models) - 5} more")
@@ -36,7 +37,7 @@ print("\n[3] Testing Gemini models discovery...")
 try:
     gemini_models = core._get_gemini_models()
     print(f"✓ Found {len(gemini_models)} Gemini models:")
-    for key, value in list(gemini_models.items())[:5]:
+    for key, value in islice(gemini_models.items(), 5):
         print(f"  - {key}: {value}")
     if len(gemini_models) > 5:
         print(f"  ... and {len(gemini_models) - 5} more")
@@ -1,17 +1,68 @@
 """Assistant service - handles two-pass LLM pipeline for categorization and task generation."""
 
-import json
+import logging
 import re
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+import orjson
 
 from core.gemini_loader import GeminiLoader
-from config import BASE_DIR
+from config import BASE_DIR, PASS1_BATCH_MAX, PASS1_BATCH_WAIT_MS, PASS1_TIMEOUT, PASS2_PROMPT_CACHE
+from config import ASSISTANT_FUSED_PASS
+from services.pass1_batcher import Pass1Batcher
+
+logger = logging.getLogger(__name__)
+
+# Errors a request can hit in normal operation (bad model output, Gemini
+# not configured, Pass 1 timing out); logged without a traceback
+_EXPECTED_ERRORS = (ValueError, RuntimeError, FutureTimeoutError)
+
+# Markdown fence pattern used by AssistantService._extract_json
+_RE_FENCES = re.compile(r'```(?:json)?\s*')
+
+# Plain commands that are answered locally instead of by Pass 2, e.g.
+# "turn on the led on car", "switch the relay off", "open the gripper"
+_SIMPLE_COMMAND_PATTERNS = tuple(re.compile(p) for p in (
+    r'\b(?:turn|switch)\s+(?P<action>on|off)\s+(?:the\s+)?(?P<actuator>led|relay)\b',
+    r'\b(?:turn|switch)\s+(?:the\s+)?(?P<actuator>led|relay)\s+(?P<action>on|off)\b',
+    r'\b(?P<action>open|close)\s+(?:the\s+)?(?P<actuator>gripper)\b',
+))
+# Values, chained actions, negation, conditions/timing and questions always
+# go through Pass 2 ("don't open the gripper", "in five minutes turn off ...")
+_RE_NOT_SIMPLE = re.compile(
+    r"\d|\?|n't\b|\b(?:and|then|not|never|no|dont|if|when|unless|should|after|before|in)\b"
+)
+# Words allowed around the command and device name on the local fast path;
+# anything else in the query sends it to Pass 2
+_SIMPLE_FILLER_WORDS = frozenset({'the', 'on', 'my', 'please'})
+_RE_WORD = re.compile(r"[\w']+")
 
 
 class AssistantService:
     """Handles two-pass assistant pipeline: categorization -> task generation."""
     
+    # Used when the request doesn't name an LM model
+    DEFAULT_LM_MODEL = "gemini-2.5-flash-lite"
+    
+    # Line formats for _format_device_list
+    _BT_DEVICE_LINE = "- {name}: {mac} [Bluetooth, status: {status}]"
+    _DEVICE_LINE = "- {name}: {mac} [status: {status}]"
+    
+    _PASS1_REQUIRED_FIELDS = ('category', 'confidence', 'reasoning', 'user-data')
+    
+    # Pass 2 context cache lifetime, and how soon before expiry to replace it
+    _PASS2_CACHE_TTL = 3600
+    _PASS2_CACHE_REFRESH = 55 * 60
+    # After a failed cache creation, use plain prompts for this long
+    _PASS2_CACHE_RETRY = 10 * 60
+    # Gemini won't cache content below 1024 tokens (more on some models);
+    # at ~4 characters per token, shorter instructions aren't even tried
+    _PASS2_CACHE_MIN_CHARS = 4 * 1024
+    
     def __init__(self, device_registry):
         """Initialize assistant service with templates and dependencies.
         
@@ -25,17 +76,53 @@ class AssistantService:
         self.templates_dir = BASE_DIR / "prompt_templates"
         self.task_schemas = self._load_json(self.templates_dir / "task_schemas.json")
         self.pass1_template = self._load_text(self.templates_dir / "pass1_categorization.txt")
+        self.pass1_batch_template = self._load_text(self.templates_dir / "pass1_categorization_batch.txt")
         self.pass2_templates = self._load_json(self.templates_dir / "pass2_task_prompts.json")
+        self.fused_template = self._load_text(self.templates_dir / "fused_pass.txt")
         
-        print("[ASSISTANT_SERVICE] Initialized with two-pass pipeline")
+        # bt-control output format from task_schemas, and its JSON for prompts
+        self._bt_output_format: list = (
+            self.task_schemas.get('pass2_output_formats', {}).get('bt-control', {}).get('output-format') or []
+        )
+        self._bt_output_format_str = orjson.dumps(self._bt_output_format or None).decode()
+        
+        # Explicit context caches for the Pass 2 instructions:
+        # model -> (instructions, cached model or None, created at)
+        self._pass2_caches: Dict[str, Tuple[str, object, float]] = {}
+        # gemini_loader.generation the caches were created under
+        self._pass2_caches_generation = self.gemini_loader.generation
+        self._pass2_cache_lock = Lock()
+        # Models whose cache is being created right now (outside the lock)
+        self._pass2_cache_pending: Set[str] = set()
+        # (model, instructions) the API rejected as too small to cache
+        self._pass2_uncacheable: Set[Tuple[str, str]] = set()
+        
+        # (registry name index, compiled alternation of its names)
+        self._name_pattern: Tuple[Optional[dict], Optional[re.Pattern]] = (None, None)
+        
+        # The fused pass replaces Pass 1 in handle_request (falls back to
+        # separate passes if its template failed to load)
+        self._use_fused_pass = ASSISTANT_FUSED_PASS and bool(self.fused_template)
+        
+        # Coalesce concurrent Pass 1 calls into batched Gemini requests
+        # (only needed when handle_request runs Pass 1 on its own)
+        self._pass1_batcher = None
+        if not self._use_fused_pass and PASS1_BATCH_MAX > 1 and self.pass1_batch_template:
+            self._pass1_batcher = Pass1Batcher(
+                self._pass1_single,
+                self._pass1_many,
+                max_batch=PASS1_BATCH_MAX,
+                max_wait=PASS1_BATCH_WAIT_MS / 1000,
+            )
+        
+        logger.info("Initialized with two-pass pipeline")
     
     def _load_json(self, path: Path) -> dict:
         """Load JSON file."""
         try:
-            with path.open('r', encoding='utf-8') as f:
-                return json.load(f)
+            return orjson.loads(path.read_bytes())
         except Exception as e:
-            print(f"[ASSISTANT_SERVICE] Error loading {path}: {e}")
+            logger.error("Error loading %s: %s", path, e)
             return {}
     
     def _load_text(self, path: Path) -> str:
@@ -44,11 +131,15 @@ class AssistantService:
             with path.open('r', encoding='utf-8') as f:
                 return f.read()
         except Exception as e:
-            print(f"[ASSISTANT_SERVICE] Error loading {path}: {e}")
+            logger.error("Error loading %s: %s", path, e)
             return ""
     
     def handle_request(self, user_query: str, source_device_mac: str, lm_model: str = None) -> dict:
-        """Main entry point - orchestrates two-pass flow.
+        """Main entry point - orchestrates the categorization and task flow.
+        
+        With ASSISTANT_FUSED_PASS, bt-control requests are categorized and
+        their command generated in one Gemini call; otherwise Pass 1 and
+        Pass 2 are separate calls.
         
         Args:
             user_query: User's natural language input
@@ -59,15 +150,16 @@ class AssistantService:
             Dictionary with result or streaming flag
         """
         try:
-            print(f"\n[ASSISTANT_SERVICE] ===== NEW REQUEST =====")
-            print(f"[ASSISTANT_SERVICE] User query: {user_query}")
-            print(f"[ASSISTANT_SERVICE] Source MAC: {source_device_mac}")
+            logger.debug("New request: query=%r source_mac=%s", user_query, source_device_mac)
             
-            # Pass 1: Categorization
-            pass1_result = self.pass1_categorize(user_query, lm_model)
+            # Pass 1: Categorization (fused with Pass 2 when enabled)
+            if self._use_fused_pass:
+                pass1_result = self.fused_categorize_and_act(user_query, lm_model)
+            else:
+                pass1_result = self.pass1_categorize(user_query, lm_model)
             category = pass1_result['category']
             
-            print(f"[ASSISTANT_SERVICE] Pass 1 result: category={category}, confidence={pass1_result['confidence']}")
+            logger.info("Pass 1 result: category=%s, confidence=%s", category, pass1_result['confidence'])
             
             # Route based on category
             if category == 'text-generation':
@@ -83,10 +175,18 @@ class AssistantService:
                     }
                 }
         
+        except _EXPECTED_ERRORS as e:
+            logger.warning("handle_request failed: %r", e)
+            return {
+                "status": "error",
+                "error": {
+                    "code": "PROCESSING_ERROR",
+                    "message": str(e)
+                }
+            }
+        
         except Exception as e:
-            print(f"[ASSISTANT_SERVICE] Error in handle_request: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("handle_request failed")
             return {
                 "status": "error",
                 "error": {
@@ -105,30 +205,120 @@ class AssistantService:
         Returns:
             Dictionary with category, confidence, reasoning, user-data
         """
-        print("[ASSISTANT_SERVICE] Executing Pass 1: Categorization")
+        logger.debug("Executing Pass 1: Categorization")
         
+        if self._pass1_batcher is None:
+            return self._pass1_single(user_query, lm_model)
+        return self._pass1_batcher.submit(user_query, lm_model).result(timeout=PASS1_TIMEOUT)
+    
+    def _pass1_single(self, user_query: str, lm_model: str = None) -> dict:
+        """Categorize one query with the single-input Pass 1 prompt."""
         # Construct prompt
         prompt = self.pass1_template.replace("{user_query}", user_query)
         
         # Call Gemini
-        model = self.gemini_loader.get_model(lm_model or "gemini-2.5-flash-lite")
+        model = self.gemini_loader.get_model(lm_model or self.DEFAULT_LM_MODEL)
         response = model.generate_content(prompt)
+        self._log_cache_usage("Pass 1", response)
         raw_output = response.text.strip()
         
-        print(f"[ASSISTANT_SERVICE] Pass 1 raw output: {raw_output}")
+        logger.debug("Pass 1 raw output: %s", raw_output)
         
         # Parse JSON (remove markdown if present)
         json_text = self._extract_json(raw_output)
-        result = json.loads(json_text)
+        result = orjson.loads(json_text)
         
         # Validate required fields
-        required_fields = ['category', 'confidence', 'reasoning', 'user-data']
-        for field in required_fields:
+        for field in self._PASS1_REQUIRED_FIELDS:
             if field not in result:
                 raise ValueError(f"Pass 1 output missing required field: {field}")
         
         return result
     
+    def _pass1_many(self, user_queries: List[str], lm_model: str = None) -> List[Optional[dict]]:
+        """Categorize several queries with one batched Pass 1 prompt.
+        
+        Args:
+            user_queries: User inputs, in order
+            lm_model: Optional LM model identifier
+        
+        Returns:
+            One result per query, in order; None where the reply was missing,
+            invalid or did not match that query.
+        
+        Raises:
+            ValueError: If the reply is not a JSON array.
+        """
+        logger.debug("Executing batched Pass 1 for %d queries", len(user_queries))
+        
+        numbered = '\n'.join(
+            f"{i}. {orjson.dumps(query).decode()}" for i, query in enumerate(user_queries, 1)
+        )
+        prompt = self.pass1_batch_template.replace("{user_queries}", numbered)
+        
+        model = self.gemini_loader.get_model(lm_model or self.DEFAULT_LM_MODEL)
+        response = model.generate_content(prompt)
+        self._log_cache_usage("Pass 1 batch", response)
+        raw_output = response.text.strip()
+        
+        # Parse the JSON array (remove markdown if present)
+        start, end = raw_output.find('['), raw_output.rfind(']')
+        if start == -1 or end < start:
+            raise ValueError("Batched Pass 1 output is not a JSON array")
+        parsed = orjson.loads(raw_output[start:end + 1])
+        if not isinstance(parsed, list):
+            raise ValueError("Batched Pass 1 output is not a JSON array")
+        
+        # Only accept items that echo their own query back, so a reordered
+        # reply can never hand one user's query to another user
+        results = []
+        for i, query in enumerate(user_queries):
+            item = parsed[i] if i < len(parsed) else None
+            if (
+                isinstance(item, dict)
+                and all(f in item for f in self._PASS1_REQUIRED_FIELDS)
+                and str(item['user-data']).strip() == query.strip()
+            ):
+                results.append(item)
+            else:
+                results.append(None)
+        return results
+    
+    def fused_categorize_and_act(self, user_query: str, lm_model: str = None) -> dict:
+        """Categorize a query and, for bt-control, generate its command in one call.
+        
+        Args:
+            user_query: User's input
+            lm_model: Optional LM model identifier
+        
+        Returns:
+            Pass 1 result dict, plus a "bt_command" dict with "command" and
+            "target_device" (or None) that handle_bt_control uses instead of
+            running Pass 2.
+        """
+        logger.debug("Executing fused Pass 1 + Pass 2")
+        
+        prompt = (
+            self.fused_template
+            .replace("{output_format}", self._bt_output_format_str)
+            .replace("{device_list}", self._format_device_list())
+            .replace("{user_query}", user_query)
+        )
+        
+        model = self.gemini_loader.get_model(lm_model or self.DEFAULT_LM_MODEL)
+        response = model.generate_content(prompt)
+        self._log_cache_usage("Fused pass", response)
+        raw_output = response.text.strip()
+        
+        logger.debug("Fused pass raw output: %s", raw_output)
+        
+        result = orjson.loads(self._extract_json(raw_output))
+        for field in self._PASS1_REQUIRED_FIELDS:
+            if field not in result:
+                raise ValueError(f"Fused pass output missing required field: {field}")
+        
+        return result
+    
     def handle_text_generation(self, pass1_result: dict, lm_model: str = None) -> dict:
         """Handle text-generation category - return flag to use streaming.
         
@@ -139,7 +329,7 @@ class AssistantService:
         Returns:
             Dictionary with streaming flag
         """
-        print("[ASSISTANT_SERVICE] Handling text-generation (streaming mode)")
+        logger.debug("Handling text-generation (streaming mode)")
         return {
             "use_streaming": True,
             "user_query": pass1_result['user-data'],
@@ -157,30 +347,40 @@ class AssistantService:
         Returns:
             Complete bt-control JSON response
         """
-        print("[ASSISTANT_SERVICE] Handling bt-control")
+        logger.debug("Handling bt-control")
         
         user_data = pass1_result['user-data']
         
-        # Get device list from registry
-        device_list_str = self._format_device_list()
-        
-        # Get output format from task_schemas
-        output_format = self.task_schemas['pass2_output_formats']['bt-control'].get('output-format', [])
-        output_format_str = json.dumps(output_format) if output_format else "null"
-        
-        print(f"[ASSISTANT_SERVICE] Device list:\n{device_list_str}")
-        print(f"[ASSISTANT_SERVICE] Output format: {output_format_str}")
-        
-        # Execute Pass 2 with output format from schemas
-        command, target_device_name = self.pass2_bt_control(
-            user_data,
-            device_list_str,
-            output_format_str,
-            lm_model
-        )
-        
-        # Look up target device once
-        target_device = self._find_device_by_name(target_device_name)
+        fused = self._fused_bt_command(pass1_result)
+        local = None if fused else self._local_bt_command(user_data, self._bt_output_format)
+        if fused is not None:
+            # Command already generated by the fused pass
+            command, target_device_name = fused
+            target_device = self._find_device_by_name(target_device_name)
+            logger.info("Pass 2 skipped (fused): command=%r, target=%r", command, target_device_name)
+        elif local is not None:
+            # Simple on/off for exactly one named device: skip Pass 2
+            command, target_device = local
+            target_device_name = target_device.get('custom_name') or target_device.get('device_name', '')
+            logger.info("Pass 2 skipped: command=%r, target=%r", command, target_device_name)
+        else:
+            # Get device list from registry
+            device_list_str = self._format_device_list()
+            output_format_str = self._bt_output_format_str
+            
+            logger.debug("Device list:\n%s", device_list_str)
+            logger.debug("Output format: %s", output_format_str)
+            
+            # Execute Pass 2 with output format from schemas
+            command, target_device_name = self.pass2_bt_control(
+                user_data,
+                device_list_str,
+                output_format_str,
+                lm_model
+            )
+            
+            # Look up target device once
+            target_device = self._find_device_by_name(target_device_name)
         
         # Construct final JSON
         final_json = self._construct_bt_control_json(
@@ -214,34 +414,163 @@ class AssistantService:
         Returns:
             Tuple of (command, target_device_name)
         """
-        print("[ASSISTANT_SERVICE] Executing Pass 2: BT Control")
+        logger.debug("Executing Pass 2: BT Control")
         
-        # Load prompt template
+        # Load prompt template: static instructions + per-request part
         template_config = self.pass2_templates['bt-control']
-        prompt_template = template_config['user_prompt_template']
-        
-        # Construct prompt with actual output format
-        prompt = prompt_template.format(
-            user_data=user_data,
-            device_list=device_list,
+        instructions = template_config['instructions_template'].format(
             output_format=output_format_str
         )
+        request_text = template_config['request_template'].format(
+            user_data=user_data,
+            device_list=device_list
+        )
         
-        # Generate command
-        model = self.gemini_loader.get_model(lm_model or "gemini-2.5-flash-lite")
-        response = model.generate_content(prompt)
-        raw_output = response.text.strip()
+        # Generate command, with the instructions served from the context
+        # cache when one is available
+        model_identifier = lm_model or self.DEFAULT_LM_MODEL
+        cached_model = self._get_pass2_cached_model(model_identifier, instructions)
+        if cached_model is not None:
+            response = cached_model.generate_content(request_text, stream=True)
+        else:
+            model = self.gemini_loader.get_model(model_identifier)
+            response = model.generate_content(f"{instructions}\n\n{request_text}", stream=True)
         
-        print(f"[ASSISTANT_SERVICE] Pass 2 output:\n{raw_output}")
+        # Parse output as it streams in
+        command, target_device, raw_output = self._read_bt_command_stream(response)
         
-        # Parse output
-        command, target_device = self._parse_bt_command_output(raw_output)
+        logger.debug("Pass 2 output:\n%s", raw_output)
         
-        print(f"[ASSISTANT_SERVICE] Final command: {command}")
-        print(f"[ASSISTANT_SERVICE] Target device: {target_device}")
+        logger.info("Pass 2 result: command=%r, target=%r", command, target_device)
         
         return command, target_device
     
+    def _get_pass2_cached_model(self, model_identifier: str, instructions: str):
+        """Get a model bound to a context cache holding the Pass 2 instructions.
+        
+        Caches are created on first use and replaced shortly before their TTL
+        runs out, so requests never hit an expired cache. Creation runs
+        outside the lock; meanwhile other requests keep using the current
+        cache, or plain prompts if there is none. Instructions too short to
+        cache (by estimate, or as reported by the API) are never retried.
+        
+        Args:
+            model_identifier: Model the cache is created for
+            instructions: Static Pass 2 instructions
+        
+        Returns:
+            Cached GenerativeModel, or None if caching is disabled or failed.
+        """
+        if not PASS2_PROMPT_CACHE or len(instructions) < self._PASS2_CACHE_MIN_CHARS:
+            return None
+        if (model_identifier, instructions) in self._pass2_uncacheable:
+            return None
+        
+        with self._pass2_cache_lock:
+            if self._pass2_caches_generation != self.gemini_loader.generation:
+                # API key reloaded: models bound to the old client are stale
+                self._pass2_caches.clear()
+                self._pass2_caches_generation = self.gemini_loader.generation
+            generation = self._pass2_caches_generation
+            entry = self._pass2_caches.get(model_identifier)
+            now = time.monotonic()
+            current = None
+            if entry is not None and entry[0] == instructions:
+                _, cached_model, created_at = entry
+                max_age = self._PASS2_CACHE_REFRESH if cached_model is not None else self._PASS2_CACHE_RETRY
+                if now - created_at < max_age:
+                    return cached_model
+                if cached_model is not None and now - created_at < self._PASS2_CACHE_TTL:
+                    # Due for replacement but not expired yet
+                    current = cached_model
+            
+            if model_identifier in self._pass2_cache_pending:
+                # Another request is creating it; don't wait for the round trip
+                return current
+            self._pass2_cache_pending.add(model_identifier)
+        
+        too_small = False
+        try:
+            cached_model = self.gemini_loader.create_cached_model(
+                model_identifier, instructions, self._PASS2_CACHE_TTL
+            )
+        except Exception as e:
+            logger.warning("Context cache unavailable for %s: %s", model_identifier, e)
+            cached_model = None
+            message = str(e).lower()
+            too_small = "too small" in message or "min_total_token_count" in message
+        
+        with self._pass2_cache_lock:
+            self._pass2_cache_pending.discard(model_identifier)
+            if too_small:
+                # Retrying can't help until the instructions change
+                self._pass2_uncacheable.add((model_identifier, instructions))
+            if generation == self._pass2_caches_generation:
+                self._pass2_caches[model_identifier] = (instructions, cached_model, now)
+        return cached_model
+    
+    def _log_cache_usage(self, label: str, response) -> None:
+        """Log how much of the prompt Gemini served from its implicit cache.
+        
+        The prompt templates keep their static instructions first and the
+        per-request values last so repeated calls share a cacheable prefix.
+        """
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+        logger.debug("%s tokens: %d prompt, %d cached", label, prompt_tokens, cached_tokens)
+    
+    def _read_bt_command_stream(self, response) -> Tuple[str, str, str]:
+        """Read a streamed Pass 2 reply, stopping once command and target are known.
+        
+        Lines are parsed as they complete, so the rest of the stream is
+        skipped as soon as both the command line and the TARGET_DEVICE line
+        have arrived. Otherwise the full text goes through
+        _parse_bt_command_output.
+        
+        Args:
+            response: Streaming response from generate_content(stream=True)
+        
+        Returns:
+            Tuple of (command, target_device_name, raw text received)
+        """
+        parts = []
+        pending = ""
+        command = ""
+        target_device = ""
+        last_chunk = None
+        
+        for chunk in response:
+            last_chunk = chunk
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. the final finish_reason chunk)
+                continue
+            parts.append(text)
+            
+            *lines, pending = (pending + text).split('\n')
+            for line in lines:
+                line = line.strip()
+                if line.startswith('TARGET_DEVICE:'):
+                    target_device = line.split('TARGET_DEVICE:')[1].strip()
+                elif line and not command:
+                    command = line
+            
+            if command and target_device:
+                break
+        
+        if last_chunk is not None:
+            self._log_cache_usage("Pass 2", last_chunk)
+        
+        raw_output = "".join(parts).strip()
+        if not (command and target_device):
+            command, target_device = self._parse_bt_command_output(raw_output)
+        
+        return command, target_device, raw_output
+    
     def _parse_bt_command_output(self, raw_output: str) -> Tuple[str, str]:
         """Parse command and target device from Pass 2 output.
         
@@ -276,20 +605,21 @@ class AssistantService:
             Formatted string of devices
         """
         devices = self.device_registry.get_all_devices()
-        lines = []
+        if not devices:
+            return "No devices available"
         
-        for device in devices:
-            mac = device.get('mac_address', '')
-            name = device.get('custom_name') or device.get('device_name', 'Unknown')
-            device_type = device.get('device_type', 'unknown')
-            status = device.get('status', 'unknown')
-            
-            if device_type == 'bluetooth':
-                lines.append(f"- {name}: {mac} [Bluetooth, status: {status}]")
-            else:
-                lines.append(f"- {name}: {mac} [status: {status}]")
+        bt_tpl = self._BT_DEVICE_LINE
+        gen_tpl = self._DEVICE_LINE
+        
+        def fmt(device: dict) -> str:
+            tpl = bt_tpl if device.get('device_type') == 'bluetooth' else gen_tpl
+            return tpl.format(
+                name=device.get('custom_name') or device.get('device_name', 'Unknown'),
+                mac=device.get('mac_address', ''),
+                status=device.get('status', 'unknown'),
+            )
         
-        return '\n'.join(lines) if lines else "No devices available"
+        return '\n'.join(map(fmt, devices))
     
     def _construct_bt_control_json(
         self,
@@ -341,7 +671,7 @@ class AssistantService:
         # This keeps Bluetooth devices showing as "online" when commands are sent
         if target_mac:
             self.device_registry.update_last_seen(target_mac)
-            print(f"[ASSISTANT_SERVICE] Updated activity for target device: {target_mac}")
+            logger.debug("Updated activity for target device: %s", target_mac)
         
         # Get parent device (for Bluetooth devices)
         parent_mac = target_device.get('parent_device')
@@ -363,6 +693,81 @@ class AssistantService:
             }
         }
     
+    def _fused_bt_command(self, pass1_result: dict) -> Optional[Tuple[str, str]]:
+        """Get (command, target device name) from a fused pass result, if complete."""
+        bt_command = pass1_result.get('bt_command')
+        if not isinstance(bt_command, dict):
+            return None
+        command = str(bt_command.get('command') or '').strip()
+        target_device_name = str(bt_command.get('target_device') or '').strip()
+        if not (command and target_device_name):
+            return None
+        return command, target_device_name
+    
+    def _local_bt_command(self, user_data: str, output_format: list) -> Optional[Tuple[str, dict]]:
+        """Build a bt-control command without Pass 2 for plain on/off requests.
+        
+        Only handles a query that is nothing but a single LED/relay on/off
+        or gripper open/close plus exactly one registered device name (and
+        a few filler words such as "the" or "please"): no values, chained
+        actions, negation, conditions or questions. When an output-format
+        list is configured, the command must appear in it verbatim.
+        
+        Args:
+            user_data: User's original query
+            output_format: Output-format list from task_schemas (may be empty)
+        
+        Returns:
+            Tuple of (command, target device) or None if Pass 2 is needed
+        """
+        text = user_data.lower()
+        if _RE_NOT_SIMPLE.search(text):
+            return None
+        
+        matches = [m for p in _SIMPLE_COMMAND_PATTERNS for m in p.finditer(text)]
+        if len(matches) != 1:
+            return None
+        command = f"{matches[0]['actuator']}:{matches[0]['action']}"
+        if output_format and command not in output_format:
+            return None
+        
+        index, pattern = self._get_name_pattern()
+        if pattern is None:
+            return None
+        name_matches = list(pattern.finditer(text))
+        matched = {id(index[m.group()]): index[m.group()] for m in name_matches}
+        if len(matched) != 1:
+            return None
+        
+        # Whatever is left besides the command and device name must be filler
+        rest = list(text)
+        for m in (matches[0], *name_matches):
+            rest[m.start():m.end()] = ' ' * (m.end() - m.start())
+        if any(word not in _SIMPLE_FILLER_WORDS for word in _RE_WORD.findall(''.join(rest))):
+            return None
+        
+        return command, next(iter(matched.values()))
+    
+    def _get_name_pattern(self) -> Tuple[dict, Optional[re.Pattern]]:
+        """Get a regex matching any registered device name as a whole word.
+        
+        Rebuilt only when the registry hands out a new name index, i.e. after
+        a registration or custom-name change.
+        
+        Returns:
+            Tuple of (name index, compiled pattern or None if no names)
+        """
+        index = self.device_registry.get_name_index()
+        cached_index, pattern = self._name_pattern
+        if cached_index is not index:
+            # Longest names first so "robot arm" wins over "robot"
+            names = sorted(index, key=len, reverse=True)
+            pattern = None
+            if names:
+                pattern = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, names)) + r')(?!\w)')
+            self._name_pattern = (index, pattern)
+        return index, pattern
+    
     def _find_device_by_name(self, device_name: str) -> Optional[dict]:
         """Find device in registry by name (case-insensitive).
         
@@ -375,19 +780,17 @@ class AssistantService:
         if not device_name:
             return None
         
-        devices = self.device_registry.get_all_devices()
+        index = self.device_registry.get_name_index()
         device_name_lower = device_name.lower().strip()
         
-        for device in devices:
-            # Check custom_name first, then device_name
-            custom_name = (device.get('custom_name') or '').lower().strip()
-            auto_name = (device.get('device_name') or '').lower().strip()
-            
-            if device_name_lower == custom_name or device_name_lower == auto_name:
-                return device
-            
-            # Also check if device_name is contained in the names
-            if device_name_lower in custom_name or device_name_lower in auto_name:
+        # Exact match on custom_name or device_name
+        device = index.get(device_name_lower)
+        if device is not None:
+            return device
+        
+        # Also check if device_name is contained in the names
+        for name, device in index.items():
+            if device_name_lower in name:
                 return device
         
         return None
@@ -418,18 +821,22 @@ class AssistantService:
             Clean JSON string
         """
         # Remove markdown code blocks
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
-        
-        # Find JSON object
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
+        if '```' in text:
+            text = _RE_FENCES.sub('', text)
+        
+        # Find JSON object (first '{' through last '}')
+        start = text.find('{')
+        end = text.rfind('}')
+        if start != -1 and end > start:
+            json_str = text[start:end + 1]
             
             # Fix double curly braces (Gemini sometimes returns {{ }} instead of { })
-            # Replace {{ with { and }} with } but only at the start/end
-            json_str = re.sub(r'^\{\{', '{', json_str)
-            json_str = re.sub(r'\}\}$', '}', json_str)
+            # Replace {{ with { and }} with } but only at the start/end. A
+            # trailing }} alone is left alone: nested objects end that way
+            if json_str.startswith('{{'):
+                json_str = json_str[1:]
+                if json_str.endswith('}}'):
+                    json_str = json_str[:-1]
             
             return json_str
         
@@ -1,10 +1,17 @@
 """Model catalog service - manages available STT and LM models."""
 
-from typing import Dict, Tuple
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from typing import Dict, Optional, Tuple
 from core.utils import load_json, save_json
 from core.gemini_loader import GeminiLoader
 from config import MODEL_CATALOG_PATH
 
+logger = logging.getLogger(__name__)
+
 
 def _get_whisper_models() -> dict:
     """Get available Whisper models from faster-whisper library.
@@ -16,7 +23,7 @@ def _get_whisper_models() -> dict:
         from faster_whisper.utils import _MODELS
         return dict(_MODELS)
     except (ImportError, AttributeError):
-        print("[CATALOG] Warning: faster-whisper._MODELS not available, using fallback")
+        logger.warning("faster-whisper._MODELS not available, using fallback")
         return {
             "tiny": "Systran/faster-whisper-tiny",
             "tiny.en": "Systran/faster-whisper-tiny.en",
@@ -49,28 +56,42 @@ def _get_gemini_models_fallback() -> dict:
 class CatalogService:
     """Manages model catalog for STT and LM models."""
     
+    # Seconds the parsed catalog is trusted before the file's mtime is checked again
+    CATALOG_RECHECK_SECONDS = 5
+    
     def __init__(self):
         """Initialize catalog service."""
         self.gemini_loader = GeminiLoader()
-        print("[CATALOG_SERVICE] Initialized")
+        # (file mtime, parsed catalog, monotonic time of the mtime check),
+        # (parsed catalog, app view) and (app view, serialized /catalog
+        # body); each is swapped in as one tuple so concurrent requests
+        # never see a mix
+        self._cache: Optional[Tuple[int, dict, float]] = None
+        self._app_cache: Optional[Tuple[dict, dict]] = None
+        self._body_cache: Optional[Tuple[dict, bytes]] = None
+        # (parsed catalog, LM section, default LM identifier)
+        self._lm_cache: Optional[Tuple[dict, dict, str]] = None
+        logger.debug("Initialized")
     
     def update_catalog(self) -> None:
         """Update catalog JSON file with models from libraries.
         
         Should be called on server startup to discover available models.
         """
-        print("[CATALOG] Updating catalog from libraries...")
+        logger.info("Updating catalog from libraries...")
         
         try:
-            # Discover STT models
-            stt_models = _get_whisper_models()
-            
-            # Discover LM models
-            try:
-                lm_models = self.gemini_loader.list_available_models()
-            except Exception as e:
-                print(f"[CATALOG] Could not fetch Gemini models ({e}), using fallback")
-                lm_models = _get_gemini_models_fallback()
+            # Discover STT (local import) and LM (network call) models concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                stt_future = executor.submit(_get_whisper_models)
+                lm_future = executor.submit(self.gemini_loader.list_available_models)
+                
+                stt_models = stt_future.result()
+                try:
+                    lm_models = lm_future.result()
+                except Exception as e:
+                    logger.warning("Could not fetch Gemini models (%s), using fallback", e)
+                    lm_models = _get_gemini_models_fallback()
             
             # Build catalog structure
             catalog = {
@@ -80,33 +101,63 @@ class CatalogService:
             
             # Save to JSON file
             save_json(MODEL_CATALOG_PATH, catalog)
+            self.invalidate_cache()
             
-            print(f"[CATALOG] ✓ Updated: {len(stt_models)} STT, {len(lm_models)} LM models")
-            print(f"[CATALOG] ✓ Saved to: {MODEL_CATALOG_PATH}")
+            logger.info("Updated: %d STT, %d LM models", len(stt_models), len(lm_models))
+            logger.info("Saved to: %s", MODEL_CATALOG_PATH)
             
         except Exception as e:
-            print(f"[CATALOG] ✗ Failed to update catalog: {e}")
+            logger.error("Failed to update catalog: %s", e)
+    
+    def invalidate_cache(self) -> None:
+        """Make the next lookup re-check the catalog file."""
+        self._cache = None
     
     def get_raw_catalog(self) -> dict:
         """Get raw catalog data from JSON file.
         
+        The parsed file is cached and only re-read when its mtime changes;
+        the mtime itself is checked at most every CATALOG_RECHECK_SECONDS,
+        so model lookups on the request path don't touch the filesystem.
+        Callers must not mutate the returned dict.
+        
         Returns:
             Dictionary with 'STT' and 'LM' sections.
         """
+        now = time.monotonic()
+        cached = self._cache
+        if cached is not None and now - cached[2] < self.CATALOG_RECHECK_SECONDS:
+            return cached[1]
+        
+        try:
+            mtime = MODEL_CATALOG_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        
+        if cached is not None and cached[0] == mtime:
+            self._cache = (mtime, cached[1], now)
+            return cached[1]
+        
         data = load_json(MODEL_CATALOG_PATH)
         if not isinstance(data, dict):
-            return {"STT": {}, "LM": {}}
+            data = {"STT": {}, "LM": {}}
+        if mtime is not None:
+            self._cache = (mtime, data, now)
         return data
     
     def get_catalog_for_app(self) -> dict:
         """Get model catalog formatted for Flutter app.
         
-        Returns only display names and enabled status.
+        Returns only display names and enabled status. The result is
+        cached alongside the parsed catalog.
         
         Returns:
             Dictionary with 'stt_models' and 'lm_models' arrays.
         """
         data = self.get_raw_catalog()
+        cached = self._app_cache
+        if cached is not None and cached[0] is data:
+            return cached[1]
         
         # Convert STT models
         stt_dict = data.get("STT", {})
@@ -131,10 +182,29 @@ class CatalogService:
                         "type": "lm"
                     })
         
-        return {
+        result = {
             "stt_models": stt_models,
             "lm_models": lm_models
         }
+        self._app_cache = (data, result)
+        return result
+    
+    def get_catalog_response_body(self) -> bytes:
+        """Get the serialized /catalog response body.
+        
+        Serialized once per app view, so requests only copy bytes.
+        
+        Returns:
+            orjson bytes of {"status": "success", "data": <app catalog>}.
+        """
+        app_catalog = self.get_catalog_for_app()
+        cached = self._body_cache
+        if cached is not None and cached[0] is app_catalog:
+            return cached[1]
+        
+        body = orjson.dumps({"status": "success", "data": app_catalog})
+        self._body_cache = (app_catalog, body)
+        return body
     
     def resolve_stt_model(self, requested_name: str) -> Tuple[str, str]:
         """Resolve STT model name to (model_name, repo_url).
@@ -173,23 +243,32 @@ class CatalogService:
         Returns:
             Full model identifier (e.g., 'models/gemini-2.5-flash').
         """
-        catalog = self.get_raw_catalog()
-        lm = catalog.get("LM")
-        
-        if not isinstance(lm, dict):
-            return "models/gemini-2.5-flash"
+        lm, default = self._get_lm_table()
         
         # If specific model requested and found, use it
-        if requested_name and requested_name in lm:
-            return lm[requested_name]
+        if requested_name:
+            return lm.get(requested_name) or default
+        return default
+    
+    def _get_lm_table(self) -> Tuple[dict, str]:
+        """Get the LM section and its default model, cached per parsed catalog.
         
-        # Otherwise, try preferred models
-        for candidate in ("gemini-flash-latest", "gemini-2.5-flash", "gemini-2.5-pro"):
-            if candidate in lm:
-                return lm[candidate]
+        Returns:
+            Tuple of (LM name -> identifier dict, default identifier).
+        """
+        catalog = self.get_raw_catalog()
+        cached = self._lm_cache
+        if cached is not None and cached[0] is catalog:
+            return cached[1], cached[2]
         
-        # Fallback to first available model
-        for _k, v in lm.items():
-            return v
+        lm = catalog.get("LM")
+        if not isinstance(lm, dict):
+            lm = {}
         
-        return "models/gemini-2.5-flash"
+        # Preferred models first, then the first available one
+        default = next(
+            (lm[k] for k in ("gemini-flash-latest", "gemini-2.5-flash", "gemini-2.5-pro") if k in lm),
+            next(iter(lm.values()), "models/gemini-2.5-flash"),
+        )
+        self._lm_cache = (catalog, lm, default)
+        return lm, default
@@ -1,13 +1,16 @@
 """Device management service - business logic for device tracking."""
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
 from models.device_model import DeviceRegistry
 
 
 class DeviceService:
     """Handles device registration, tracking, and status management."""
     
+    # Headers auto-registration reads (request header lookups are case-insensitive)
+    _DEVICE_HEADERS = ('X-Device-Id', 'X-Device-Name', 'X-Device-Model', 'X-Device-MAC')
+    
     def __init__(self, registry: DeviceRegistry):
         """Initialize device service with registry.
         
@@ -48,25 +51,39 @@ class DeviceService:
             mac_address=mac_address
         )
     
-    def auto_register_from_headers(self, headers: dict, ip_address: str) -> Optional[dict]:
+    def auto_register_from_headers(self, headers: Mapping[str, str], ip_address: str) -> Optional[dict]:
         """Auto-register device from HTTP request headers.
         
+        Each lookup on the request's headers object scans the whole header
+        list, so the device headers are read once here and the registry
+        only sees that small dict. Requests without a usable MAC or
+        device_id are dropped before reaching the registry.
+        
         Args:
-            headers: Request headers dictionary
+            headers: Request headers mapping (case-insensitive, e.g. request.headers)
             ip_address: Client IP address
         
         Returns:
             Device record if registered, None otherwise.
         """
-        return self.registry.auto_register_from_headers(headers, ip_address)
+        device_headers = {name: headers.get(name) for name in self._DEVICE_HEADERS}
+        if (
+            device_headers['X-Device-MAC'] in (None, '', 'null')
+            and device_headers['X-Device-Id'] in (None, '', 'null', 'unknown')
+        ):
+            return None
+        return self.registry.auto_register_from_headers(device_headers, ip_address)
     
-    def update_activity(self, mac_address: str) -> None:
+    def update_activity(self, mac_address: str) -> bool:
         """Update device last_seen timestamp.
         
         Args:
             mac_address: Device MAC address
+        
+        Returns:
+            True if the device is registered and was updated, False otherwise.
         """
-        self.registry.update_last_seen(mac_address)
+        return self.registry.update_last_seen(mac_address)
     
     def update_statuses(self) -> None:
         """Update device statuses (mark offline if inactive)."""
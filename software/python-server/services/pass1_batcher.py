@@ -0,0 +1,141 @@
+"""Micro-batching for Pass 1 categorization requests.
+
+Concurrent assistant requests each need one short Gemini call to categorize
+the user's query. The batcher collects requests that arrive within a short
+window and categorizes them with a single multi-query prompt.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (user_query, lm_model, future)
+_Item = Tuple[str, Optional[str], Future]
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Whether an API error is a 429 / quota error (e.g. ResourceExhausted)."""
+    if getattr(error, "code", None) == 429 or type(error).__name__ == "ResourceExhausted":
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+class Pass1Batcher:
+    """Coalesces Pass 1 categorization calls into batched Gemini requests.
+
+    A daemon thread collects submitted queries for up to ``max_wait``
+    seconds (or until ``max_batch`` are pending) and hands each group to a
+    small pool. Groups are split by LM model. A group of one uses the normal
+    single-query prompt; larger groups use the batch prompt, and any query
+    the batch reply doesn't cover is retried on its own (concurrently). A
+    batch that fails with a rate-limit or quota error is not retried; its
+    queries fail with that error.
+    """
+
+    def __init__(
+        self,
+        categorize_one: Callable[[str, Optional[str]], dict],
+        categorize_many: Callable[[List[str], Optional[str]], List[Optional[dict]]],
+        max_batch: int = 8,
+        max_wait: float = 0.075,
+        workers: int = 4,
+    ):
+        """Initialize the batcher.
+
+        Args:
+            categorize_one: Categorizes a single query.
+            categorize_many: Categorizes several queries in one call; returns
+                one result (or None if missing/invalid) per query, in order.
+            max_batch: Maximum number of queries per Gemini call.
+            max_wait: Seconds to wait for more queries after the first one.
+            workers: Number of batches that may be in flight at once.
+        """
+        self._categorize_one = categorize_one
+        self._categorize_many = categorize_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[_Item]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pass1")
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, user_query: str, lm_model: Optional[str] = None) -> Future:
+        """Queue a query for categorization.
+
+        Args:
+            user_query: User's input
+            lm_model: Optional LM model identifier
+
+        Returns:
+            Future resolving to the Pass 1 result dict.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((user_query, lm_model, future))
+        return future
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name="pass1-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> None:
+        """Gather queued queries into batches and dispatch them."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(item[1], []).append(item)
+            for lm_model, items in by_model.items():
+                self._pool.submit(self._run, lm_model, items)
+
+    def _run(self, lm_model: Optional[str], items: List[_Item]) -> None:
+        """Categorize one group and resolve its futures."""
+        if len(items) == 1:
+            self._run_single(items[0])
+            return
+
+        try:
+            results = self._categorize_many([query for query, _, _ in items], lm_model)
+        except Exception as e:
+            if _is_rate_limited(e):
+                # Retrying each query would only send more calls into the limit
+                logger.warning("Batch of %d hit a rate limit (%s), failing it", len(items), e)
+                for item in items:
+                    item[2].set_exception(e)
+                return
+            logger.warning("Batch of %d failed (%s), retrying individually", len(items), e)
+            results = [None] * len(items)
+
+        for item, result in zip(items, results):
+            if result is None:
+                # Separate tasks, so the retries run concurrently
+                self._pool.submit(self._run_single, item)
+            else:
+                item[2].set_result(result)
+
+    def _run_single(self, item: _Item) -> None:
+        user_query, lm_model, future = item
+        try:
+            future.set_result(self._categorize_one(user_query, lm_model))
+        except Exception as e:
+            future.set_exception(e)
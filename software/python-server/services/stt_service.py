@@ -1,7 +1,8 @@
 """STT (Speech-to-Text) service - business logic for audio transcription."""
 
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 from core.whisper_loader import WhisperLoader
+from config import WHISPER_PRELOAD_MODEL, WHISPER_IDLE_TTL, WHISPER_BATCH_SIZE
 
 
 class STTService:
@@ -12,20 +13,48 @@ class STTService:
         self.whisper_loader = WhisperLoader()
         print("[STT_SERVICE] Initialized")
     
+    def preload_default_model(self) -> None:
+        """Load WHISPER_PRELOAD_MODEL so the first transcription doesn't wait for it.
+        
+        Does nothing if WHISPER_PRELOAD_MODEL is empty. Failures (e.g.
+        faster-whisper not installed) are logged, not raised.
+        """
+        if not WHISPER_PRELOAD_MODEL:
+            return
+        try:
+            print(f"[STT_SERVICE] Preloading Whisper model: {WHISPER_PRELOAD_MODEL}")
+            self.whisper_loader.preload(WHISPER_PRELOAD_MODEL)
+        except RuntimeError as e:
+            print(f"[STT_SERVICE] Whisper preload failed: {e}")
+    
+    def evict_idle_model(self) -> None:
+        """Free the Whisper model if it has been idle for WHISPER_IDLE_TTL seconds.
+        
+        Does nothing if WHISPER_IDLE_TTL is 0.
+        """
+        if WHISPER_IDLE_TTL > 0:
+            self.whisper_loader.evict_idle(WHISPER_IDLE_TTL)
+    
     def transcribe_audio(
         self,
-        audio_file_path: str,
+        audio_file_path: Union[str, BinaryIO],
         model_name: str,
         language: Optional[str] = None,
-        device: str = "auto"
+        device: str = "auto",
+        beam_size: int = 1
     ) -> str:
         """Transcribe an audio file.
         
+        With WHISPER_BATCH_SIZE above 1, speech segments are decoded in
+        parallel batches, which mainly speeds up long recordings.
+        
         Args:
-            audio_file_path: Path to audio file
+            audio_file_path: Path to audio file, or a seekable binary file
+                object such as an upload's stream
             model_name: Whisper model name (e.g., 'small', 'base')
             language: Optional language code (e.g., 'en')
             device: Device to use ('cpu', 'cuda', or 'auto')
+            beam_size: Decoder beam width (1 = greedy, 5 = beam search)
         
         Returns:
             Transcribed text string.
@@ -37,5 +66,7 @@ class STTService:
             audio_file_path=audio_file_path,
             model_name=model_name,
             language=language,
-            device=device
+            device=device,
+            beam_size=beam_size,
+            batch_size=WHISPER_BATCH_SIZE
         )